@@ -1,12 +1,12 @@
 """Compare the execution time of each method"""
 
-import copy
 import datetime
 import json
 import pathlib
 import timeit
 
 from quantikai.bot import minmax, montecarlo
+from quantikai.bot.montecarlo import playout
 from quantikai.game import Board, Colors, Move, Pawns, Player
 
 
@@ -40,8 +40,8 @@ def init_test_values():
         Move(3, 3, Pawns.A, Colors.RED),
     ]
     for move in moves:
-        tmp_board: Board = copy.deepcopy(board)
-        tmp_player = copy.deepcopy(current_player)
+        tmp_board = board.copy()
+        tmp_player = current_player.clone()
 
         tmp_board.play(move)
         tmp_player.remove(move.pawn)
@@ -66,6 +66,7 @@ def get_method_times():
         "timestamp": timestamp,
         "montecarlo": dict(),
         "minmax": dict(),
+        "playouts": dict(),
     }
     idx = 0
     result_file = pathlib.Path("bot_algo_time_" + timestamp + ".json")
@@ -76,6 +77,8 @@ def get_method_times():
         "use_depth": True,
     }
     times["minmax"]["args"] = {}
+    # raw speed of the vectorized random playouts, in playouts per second
+    times["playouts"]["args"] = {"n": 10000}
 
     boards, players = init_test_values()
     other_player = players[1]
@@ -105,6 +108,20 @@ def get_method_times():
             min(d.repeat(n_repeat, n_iter)) / n_iter, 2
         )
 
+        d = timeit.Timer(
+            lambda: playout.random_playouts(
+                board=board,
+                current_player=player,
+                other_player=other_player,
+                **times["playouts"]["args"]
+            )
+        )
+        times["playouts"][idx] = round(
+            times["playouts"]["args"]["n"]
+            * n_iter
+            / min(d.repeat(n_repeat, n_iter))
+        )
+
         # Update the measures at every iteration
         result_file.write_text(json.dumps(times, indent=2))
 
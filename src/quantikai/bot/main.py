@@ -9,11 +9,24 @@ def get_best_move(
     current_player: Player,
     other_player: Player,
     game_tree_folder: pathlib.Path | None = None,
+    session: montecarlo.SearchSession | None = None,
+    num_process: int = montecarlo.NUM_PROCESS,
+    time_budget: float | None = None,
 ) -> Move | None:
 
+    if session is not None:
+        # keep the search tree from one move to the next
+        return session.get_best_move(
+            board=board,
+            current_player=current_player,
+            other_player=other_player,
+            game_tree_folder=game_tree_folder,
+        )
     return montecarlo.get_best_move(
         board=board,
         current_player=current_player,
         other_player=other_player,
         game_tree_folder=game_tree_folder,
+        num_process=num_process,
+        time_budget=time_budget,
     )
@@ -1,5 +1,3 @@
-import copy
-
 from quantikai.game import Board, Colors, Move, Player
 
 
@@ -8,11 +6,12 @@ def get_best_move(
     current_player: Player,
     other_player: Player,
 ) -> Move | None:
+    # the search plays and undoes moves on its own copies
     _, best_move = _recursive_minmax(
         player_max=current_player.color,
-        board=board,
-        current_player=current_player,
-        other_player=other_player,
+        board=board.copy(),
+        current_player=current_player.clone(),
+        other_player=other_player.clone(),
     )
     return best_move
 
@@ -37,10 +36,23 @@ def _recursive_minmax(
         tuple[int, tuple[int, int, Pawns, Colors]]:
     """
 
-    possible_moves = board.get_possible_moves(
-        current_player.pawns,
-        current_player.color,
-        optimize=True,
+    # Winning moves are read from the board line counters: if there is
+    # one, no need to go through the other moves
+    winning_moves = board.get_winning_moves(
+        current_player.pawns, current_player.color
+    )
+    if len(winning_moves) > 0:
+        if current_player.color == player_max:
+            return 1, winning_moves[0]
+        return -1, winning_moves[0]
+
+    # list: the board changes while we go through the moves
+    possible_moves = list(
+        board.get_possible_moves(
+            current_player.pawns,
+            current_player.color,
+            optimize=True,
+        )
     )
 
     best_move = None
@@ -50,27 +62,27 @@ def _recursive_minmax(
     # TODO: test
     best_depth = None
     for move in possible_moves:
-        tmp_board = copy.deepcopy(board)
-        tmp_player = copy.deepcopy(current_player)
-        is_a_win = tmp_board.play(move)
-        tmp_player.remove(move.pawn)
+        is_a_win = board.play(move)
+        current_player.remove(move.pawn)
 
         move_score = None
         if is_a_win:
-            if tmp_player.color == player_max:
+            if current_player.color == player_max:
                 move_score = 1
             else:
                 move_score = -1
         else:
             move_score, _ = _recursive_minmax(
                 player_max=player_max,
-                board=tmp_board,
+                board=board,
                 current_player=other_player,
-                other_player=tmp_player,
+                other_player=current_player,
                 depth=depth + 1,
             )
+        board.undo(move)
+        current_player.add(move.pawn)
 
-        if tmp_player.color == player_max:
+        if current_player.color == player_max:
             # Maximise the score
             if best_score is None or best_score < move_score:
                 best_move = move
@@ -1,8 +1,19 @@
 from quantikai.bot.montecarlo.main import (
+    NUM_PROCESS,
     generate_tree,
     get_best_move,
     get_best_play,
     get_move_stats,
 )
+from quantikai.bot.montecarlo.pool import shutdown_pool
+from quantikai.bot.montecarlo.session import SearchSession
 
-__all__ = ["get_best_move", "get_best_play", "get_move_stats", "generate_tree"]
+__all__ = [
+    "get_best_move",
+    "get_best_play",
+    "get_move_stats",
+    "generate_tree",
+    "SearchSession",
+    "shutdown_pool",
+    "NUM_PROCESS",
+]
@@ -1,9 +1,21 @@
 import json
 import pathlib
 
-from quantikai.bot.montecarlo.node import Node
-from quantikai.bot.montecarlo.score import MonteCarloScore
-from quantikai.game import Board, Colors, FrozenBoard, Move
+from quantikai.bot.montecarlo.node import (
+    MOVE_BITS,
+    MOVE_MASK,
+    NO_MOVE,
+    Node,
+    child_board_code,
+    count_pawns,
+    unpack_move,
+)
+from quantikai.bot.montecarlo.score import (
+    UNPROVEN,
+    MonteCarloScore,
+    compute_uct,
+)
+from quantikai.game import Colors, FrozenBoard, Move
 from quantikai.game.exceptions import InvalidFileException
 
 
@@ -13,65 +25,114 @@ class GameTreeError(Exception):
 
 
 class GameTree:
-    _game_tree: dict[Node, MonteCarloScore]
+    # Keys are packed nodes, see node.pack_node
+    _scores: dict[int, MonteCarloScore]
+    # Board code -> packed nodes that play a move on that board
+    _children_codes: dict[int, list[int]]
+    # Number of search iterations behind the scores (0 if unknown)
+    iterations: int
+    # Number of iterations not run, the best move being known (early_stop)
+    iterations_saved: int
 
-    def __init__(self, game_tree=None):
-        self._game_tree = dict()
+    def __init__(self, game_tree: dict[Node, MonteCarloScore] | None = None):
+        self._scores = dict()
+        self.iterations = 0
+        self.iterations_saved = 0
+        self._children_codes = dict()
         if game_tree is not None:
-            self._game_tree = game_tree
+            for node, montecarlo in game_tree.items():
+                self._insert(node.code, montecarlo)
 
-    def add(self, node: Node):
-        self._game_tree.setdefault(node, MonteCarloScore())
+    @property
+    def _game_tree(self) -> dict[Node, MonteCarloScore]:
+        return {
+            Node.from_code(code): montecarlo
+            for code, montecarlo in self._scores.items()
+        }
+
+    @classmethod
+    def _from_scores(cls, scores: dict[int, MonteCarloScore]) -> "GameTree":
+        game_tree = cls()
+        game_tree._scores = scores
+        for code in scores:
+            game_tree._index(code)
+        return game_tree
+
+    @staticmethod
+    def _code(node: Node | int) -> int:
+        return node if isinstance(node, int) else node.code
+
+    def _index(self, code: int):
+        if code & MOVE_MASK != NO_MOVE:
+            self._children_codes.setdefault(code >> MOVE_BITS, []).append(code)
 
-    def compute_score(self, node: Node):
-        return self._game_tree[node].compute_score()
+    def _insert(self, code: int, montecarlo: MonteCarloScore):
+        if code not in self._scores:
+            self._index(code)
+        self._scores[code] = montecarlo
 
-    def update(self, node: Node, reward: int):
-        self._game_tree[node].times_visited += 1
-        self._game_tree[node].score += reward
+    def add(self, node: Node | int):
+        code = self._code(node)
+        if code not in self._scores:
+            self._insert(code, MonteCarloScore())
+
+    def compute_score(self, node: Node | int):
+        return self._scores[self._code(node)].compute_score()
+
+    def update(self, node: Node | int, reward: int):
+        code = self._code(node)
+        montecarlo = self._scores.get(code)
+        if montecarlo is None:
+            montecarlo = MonteCarloScore()
+            self._insert(code, montecarlo)
+        montecarlo.times_visited += 1
+        montecarlo.score += reward
+
+    def _children(self, board_code: int):
+        for code in self._children_codes.get(board_code, ()):
+            yield code, self._scores[code]
+
+    def _get_best_child(self, board_code: int) -> int | None:
+        # Careful: if not all nodes have been visited, will ignore the unvisited nodes
+        # Choose a proven win, else the most visited node
+        best_code = None
+        best_key = None
+        for code, montecarlo in self._children(board_code):
+            if montecarlo.times_visited > 0:
+                key = (
+                    montecarlo.proven,
+                    montecarlo.times_visited,
+                    montecarlo.score,
+                )
+                if best_key is None or key > best_key:
+                    best_code = code
+                    best_key = key
+        return best_code
 
     def get_best_move(self, frozen_board: FrozenBoard) -> Move | None:
         # TODO - game tree should be method agnostic ie no knowledge of montecarlo
-        # Careful: if not all nodes have been visited, will ignore the unvisited nodes
-        # Choose the most visited node
-        best_move = None
-        n_visited = None
-        best_score = None
-        for node, montecarlo in self._game_tree.items():
-            if node.board == frozen_board and node.move_to_play is not None:
-                if montecarlo.times_visited > 0:
-                    if (
-                        n_visited is None
-                        or montecarlo.times_visited > n_visited
-                        or (
-                            montecarlo.times_visited == n_visited
-                            and montecarlo.score > best_score
-                        )
-                    ):
-                        best_move = node.move_to_play
-                        n_visited = montecarlo.times_visited
-                        best_score = montecarlo.score
-        return best_move
+        best_code = self._get_best_child(frozen_board.code)
+        if best_code is None:
+            return None
+        return unpack_move(best_code)
 
     def get_best_play(self, frozen_board: FrozenBoard, depth: int = 16):
-        best_node = None
-        best_move = self.get_best_move(frozen_board)
-        if best_move is None:
+        best_code = self._get_best_child(frozen_board.code)
+        if best_code is None:
             # game tree scores have not been computed
             return list()
-        best_node = Node(board=frozen_board, move_to_play=best_move)
-        best_play = [(best_node, self._game_tree[best_node])]
-        tmp_board = Board(board=frozen_board)
+        best_codes = [best_code]
 
         for _ in range(depth):
-            tmp_board.play(best_node.move_to_play)
-            tmp_frozen_board = tmp_board.get_frozen()
-            best_move = self.get_best_move(tmp_frozen_board)
-            if best_move is None:
+            best_code = self._get_best_child(
+                child_board_code(best_code >> MOVE_BITS, best_code & MOVE_MASK)
+            )
+            if best_code is None:
                 break
-            best_node = Node(board=tmp_frozen_board, move_to_play=best_move)
-            best_play.append((best_node, self._game_tree[best_node]))
-        return best_play
+            best_codes.append(best_code)
+        return [
+            (Node.from_code(code), self._scores[code]) for code in best_codes
+        ]
 
     def get_move_stats(self, frozen_board: FrozenBoard, depth: int = 16):
         best_play = self.get_best_play(
@@ -82,45 +143,69 @@ class GameTree:
             return list()
 
         move_stats = [
-            (node.move_to_play, montecarlo)
-            for node, montecarlo in self._game_tree.items()
-            if node.board == best_play[-1][0].board
-            and node.move_to_play is not None
+            (unpack_move(code), montecarlo)
+            for code, montecarlo in self._children(best_play[-1][0].board.code)
         ]
         move_stats.sort(
-            key=lambda x: (x[1].times_visited, x[1].score), reverse=True
+            key=lambda x: (x[1].proven, x[1].times_visited, x[1].score),
+            reverse=True,
         )
         return move_stats
 
     def get(self, depth: int) -> "GameTree":
-        return GameTree(
+        return GameTree._from_scores(
             {
-                node: montecarloscore
-                for node, montecarloscore in self._game_tree.items()
-                if len(node.board) == depth
+                code: montecarloscore
+                for code, montecarloscore in self._scores.items()
+                if count_pawns(code) == depth
             }
         )
 
+    def _add_stats(
+        self,
+        code: int,
+        times_visited: int,
+        times_parent_visited: int,
+        score: int,
+        proven: int = UNPROVEN,
+    ):
+        montecarlo = self._scores.get(code)
+        if montecarlo is None:
+            montecarlo = MonteCarloScore()
+            self._insert(code, montecarlo)
+        montecarlo.times_visited += times_visited
+        montecarlo.times_parent_visited += times_parent_visited
+        montecarlo.score += score
+        if proven != UNPROVEN:
+            montecarlo.proven = proven
+
+    def compute_uct(self):
+        """Set the uct of the nodes from their summed stats"""
+        for montecarlo in self._scores.values():
+            montecarlo.uct = compute_uct(
+                score=montecarlo.score,
+                times_visited=montecarlo.times_visited,
+                times_parent_visited=montecarlo.times_parent_visited,
+            )
+
     @staticmethod
     def sum(game_trees: list["GameTree"]) -> "GameTree":
-        if len(game_trees) == 0:
-            return GameTree()
         if len(game_trees) == 1:
             return game_trees[0]
-        new_gm = dict()
-        for node in game_trees[0]._game_tree:
-            mscores = [
-                g._game_tree[node] for g in game_trees if node in g._game_tree
-            ]
-            new_gm[node] = MonteCarloScore(
-                times_visited=sum([m.times_visited for m in mscores]),
-                times_parent_visited=sum(
-                    [m.times_parent_visited for m in mscores]
-                ),
-                score=sum([m.score for m in mscores]),
-                uct=sum([m.uct for m in mscores]),
-            )
-        return GameTree(new_gm)
+        new_gm = GameTree()
+        for game_tree in game_trees:
+            new_gm.iterations += game_tree.iterations
+            new_gm.iterations_saved += game_tree.iterations_saved
+            for code, montecarlo in game_tree._scores.items():
+                new_gm._add_stats(
+                    code,
+                    montecarlo.times_visited,
+                    montecarlo.times_parent_visited,
+                    montecarlo.score,
+                    montecarlo.proven,
+                )
+        new_gm.compute_uct()
+        return new_gm
 
     # TODO
     # Test, and remove these functions if I do not implement a pre-compute of the game tree
@@ -134,22 +219,27 @@ class GameTree:
                 f"{path} does not exist or is not a directory."
             )
 
+        game_tree_json: list[list] = [list() for _ in range(max_depth)]
+        for code, montecarlo in self._scores.items():
+            idx = count_pawns(code)
+            move = unpack_move(code)
+            if (
+                idx < max_depth
+                and move is not None
+                and move.color == player_color
+            ):
+                game_tree_json[idx].append(
+                    {
+                        "node": Node.from_code(code).to_compressed(),
+                        "montecarlo": montecarlo.to_compressed(),
+                    }
+                )
         for idx in range(max_depth):
             file_path = path / self.get_file_name(
                 depth=idx, player_color=player_color
             )
-            game_tree_json = [
-                {
-                    "node": node.to_compressed(),
-                    "montecarlo": montecarlo.to_compressed(),
-                }
-                for node, montecarlo in self._game_tree.items()
-                if len(node.board) == idx
-                and node.move_to_play is not None
-                and node.move_to_play.color == player_color
-            ]
-            if len(game_tree_json) > 0:
-                file_path.write_text(json.dumps(game_tree_json))
+            if len(game_tree_json[idx]) > 0:
+                file_path.write_text(json.dumps(game_tree_json[idx]))
 
     class GameTreeDecoder(json.JSONDecoder):
         def __init__(self, *args, **kwargs):
@@ -1,68 +1,137 @@
-import copy
-import multiprocessing
+import logging
+import math
 import pathlib
 import random
+import time
+
+import numpy as np
 
 from quantikai.bot.montecarlo.game_tree import GameTree
 from quantikai.bot.montecarlo.node import Node
-from quantikai.bot.montecarlo.score import MonteCarloScore
-from quantikai.game import Board, Colors, Move, Player
+from quantikai.bot.montecarlo.node_table import (
+    NODE_SIZE,
+    ROOT,
+    NodeTable,
+    NodeTableFull,
+    SharedNodeTable,
+)
+from quantikai.bot.montecarlo.playout import random_playouts
+from quantikai.bot.montecarlo.pool import imap_in_pool, run_in_pool
+from quantikai.bot.montecarlo.score import (
+    PROVEN_LOSS,
+    PROVEN_WIN,
+    UNPROVEN,
+    MonteCarloScore,
+)
+from quantikai.bot.montecarlo.transposition import (
+    IDENTITY,
+    TranspositionNodeTable,
+    compose,
+    inverse,
+)
+from quantikai.game import Board, Colors, Move, Player, bitboard
 from quantikai.game.exceptions import InvalidFileException
+from quantikai.game.symmetry import SYMMETRIES
+
+logger = logging.getLogger(__name__)
 
 ITERATIONS = 10000
 USE_DEPTH = True
 GAME_TREE_FILE_MAX_DEPTH = 2
 NUM_PROCESS = 1
+# How the processes share the work when num_process > 1
+ROOT_PARALLEL = "root"  # independent trees, summed at the end
+TREE_PARALLEL = "tree"  # one tree in shared memory
+LEAF_PARALLEL = "leaf"  # random games played together from new nodes
+PARALLELIZATION = ROOT_PARALLEL
+# Room for the nodes of a process in a shared node table: about 115 per
+# iteration from the empty board, up to 180 with all_possible_moves
+NODES_PER_ITERATION = 150
+# with rollout, an iteration expands one node: at most one child per move
+ROLLOUT_NODES_PER_ITERATION = len(bitboard.PAWNS) * bitboard.N_CELLS
+# at most one node expanded per move of the game
+MAX_NODES_PER_ITERATION = bitboard.N_CELLS * ROLLOUT_NODES_PER_ITERATION
+# With max_nodes, the tree is pruned down to that fraction of max_nodes
+# when the next iteration could go over it
+PRUNED_SIZE = 0.5
+# Smallest max_nodes: room for an iteration once the tree is pruned
+MIN_MAX_NODES = int(MAX_NODES_PER_ITERATION / (1 - PRUNED_SIZE))
+# With early_stop, every that many iterations, stop if the best move is
+# known with that risk of being wrong (see _root_is_decided)
+EARLY_STOP_INTERVAL = 100
+EARLY_STOP_RISK = 0.05
+MIN_NODES = 1000
+# Bytes of shared memory (/dev/shm) for the node tables of a parallel
+# search, all the processes together: with ROOT_PARALLEL, the processes
+# prune their tree to stay in their share, with TREE_PARALLEL the tree
+# stops growing
+SHARED_MEMORY = 32 * 2**20
+# Number of random games from a new node with LEAF_PARALLEL
+LEAF_PLAYOUTS = 32
+# With transpositions, the positions are looked up in that many levels of
+# the tree from the root: the deeper ones are seldom reached twice
+TRANSPOSITION_DEPTH = 5
 
 
 def _explore_node(
-    game_tree: GameTree,
+    node_table: NodeTable,
+    node: int,
     board: Board,
     player: Player,
     all_possible_moves: bool,
-) -> tuple[bool, Node | None]:
+    virtual_loss: bool = False,
+    frame: int = IDENTITY,
+) -> tuple[bool, int | None, Move | None]:
     """Explore one node: compute children nodes and execute one.
 
+    With a TranspositionNodeTable, frame maps the moves of the children
+    of the node to the moves on the board (see transposition).
+
     Returns:
         - game is over
         - it is a win for the current player
-        - explored node (None if there is no possible move)
+        - explored child node (None if there is no possible move)
+        - move played on the board
     Updates:
         - player
         - board
-        - game tree (computed the scores of the possible next nodes)
+        - node table (children of the node on its first exploration,
+          visit of the explored node with virtual_loss)
     """
-    possible_moves = board.get_possible_moves(
-        player.pawns,
-        player.color,
-        optimize=not all_possible_moves,
-    )
-    # Order the possible moves randomly for the single-run parallelization
-    possible_moves = list(possible_moves)
-    random.shuffle(possible_moves)
+    if not node_table.is_expanded(node):
+        possible_moves = list(
+            board.get_possible_moves(
+                player.pawns,
+                player.color,
+                optimize=not all_possible_moves,
+            )
+        )
+        # Order the possible moves randomly for the single-run parallelization
+        random.shuffle(possible_moves)
+        if frame != IDENTITY:
+            to_frame = SYMMETRIES[inverse(frame)]
+            possible_moves = [to_frame.apply_move(m) for m in possible_moves]
+        node_table.expand(node, possible_moves)
 
     # Choose the node with the best trade-off exploration/exploitation
-    node_to_explore = None
-    uct = None
-    frozen_board = board.get_frozen()
-    for pos_mov in possible_moves:
-        node = Node(board=frozen_board, move_to_play=pos_mov)
-        game_tree.add(node)
-        new_uct = game_tree.compute_score(node=node)
-        if uct is None or new_uct >= uct:
-            node_to_explore = node
-            uct = new_uct
-
+    node_to_explore = node_table.select_child(node)
     if node_to_explore is None:
-        # it means that len(possible_moves) == 0
+        # it means that there is no possible move
         # end case: the parent node is a leaf node
-        return True, None
+        return True, None, None
+    if virtual_loss:
+        # counted as a loss until the end of the iteration, for the other
+        # processes that search the same tree to explore other nodes
+        node_table.visits[node_to_explore] += 1
 
     # Play the chosen move and evaluate: leaf node or keep going
-    is_win = board.play(node_to_explore.move_to_play, strict=False)
-    player.remove(node_to_explore.move_to_play.pawn)
+    move_to_play = node_table.move(node_to_explore)
+    if frame != IDENTITY:
+        move_to_play = SYMMETRIES[frame].apply_move(move_to_play)
+    is_win = board.play(move_to_play, strict=False)
+    player.remove(move_to_play.pawn)
 
-    return is_win, node_to_explore
+    return is_win, node_to_explore, move_to_play
 
 
 def _one_process_algo(
@@ -72,69 +141,515 @@ def _one_process_algo(
     iterations: int,
     use_depth: bool,
     all_possible_moves: bool = False,
-    multiprocess_list: list = None,
+    max_depth: int | None = None,
+    playouts: int = 0,
+    deadline: float | None = None,
+    transpositions: bool = False,
+    rollout: bool = False,
+    max_nodes: int | None = None,
+    early_stop: bool = False,
 ) -> GameTree:
 
-    frozen_board = board.get_frozen()  # hashable version of the board
-    root_node = Node(board=frozen_board)
-    game_tree = GameTree()
-    game_tree.add(node=root_node)
-
+    if transpositions:
+        node_table = TranspositionNodeTable()
+    elif max_nodes is not None:
+        # all the memory at once, it does not grow anymore
+        node_table = NodeTable(capacity=max_nodes)
+    else:
+        node_table = NodeTable()
     random.seed()
+    n_iterations, n_saved = _search(
+        node_table=node_table,
+        board=board,
+        current_player=current_player,
+        other_player=other_player,
+        iterations=iterations,
+        use_depth=use_depth,
+        all_possible_moves=all_possible_moves,
+        playouts=playouts,
+        deadline=deadline,
+        rollout=rollout,
+        max_nodes=max_nodes,
+        early_stop=early_stop,
+    )
+    game_tree = node_table.to_game_tree(board.get_code(), max_depth=max_depth)
+    game_tree.iterations = n_iterations
+    game_tree.iterations_saved = n_saved
+    return game_tree
 
-    for _ in range(iterations):
-        is_current = False  # which player is playing
 
-        tmp_board = copy.deepcopy(board)
-        tmp_player = copy.deepcopy(current_player)
-        tmp_other = copy.deepcopy(other_player)
+def _search(
+    node_table: NodeTable,
+    board: Board,
+    current_player: Player,
+    other_player: Player,
+    iterations: int,
+    use_depth: bool,
+    all_possible_moves: bool = False,
+    virtual_loss: bool = False,
+    playouts: int = 0,
+    deadline: float | None = None,
+    rollout: bool = False,
+    max_nodes: int | None = None,
+    early_stop: bool = False,
+) -> tuple[int, int]:
+    """Run the iterations on the tree, its root being the board
+    with current_player to play.
+
+    With playouts, an iteration stops at the first node that has not been
+    visited yet and plays that many random games from there. With rollout,
+    it stops there too and plays one random game, that is not stored:
+    each iteration expands one node instead of all the nodes down to the
+    end of the game.
+
+    The end of the games are proven wins or losses (see NodeTable.solve),
+    an iteration stops at a proven node and the search stops once
+    the root is proven.
+
+    With max_nodes, the least visited nodes are pruned (see
+    NodeTable.prune) for the tree to stay under that many nodes. Once the
+    node table is full, the iterations end with a random rollout where
+    they would expand a node.
+
+    With early_stop, the search stops when the most visited child of the
+    root is the best move already (see _root_is_decided).
+
+    Returns:
+        tuple[int, int]: number of iterations done, fewer than iterations
+            if the deadline (time.time()) has passed, the root is proven or
+            the best move is known; and the number of iterations saved by
+            early_stop
+    """
+    # Each iteration plays on these and undoes its moves at the end
+    tmp_board = board.copy()
+    tmp_player = current_player.clone()
+    tmp_other = other_player.clone()
+    rng = np.random.default_rng() if playouts else None
+    transpositions = isinstance(node_table, TranspositionNodeTable)
+    # highest reward of a visit
+    max_reward = 16 if use_depth else 1
+    table_full = False
+
+    for iteration in range(iterations):
+        if deadline is not None and time.time() >= deadline:
+            return iteration, 0
+        if node_table.proven[ROOT] != UNPROVEN:
+            return iteration, 0
+        if (
+            early_stop
+            and iteration > 0
+            and iteration % EARLY_STOP_INTERVAL == 0
+            and _root_is_decided(
+                node_table=node_table,
+                remaining_visits=(iterations - iteration) * (playouts or 1),
+                max_reward=max_reward,
+            )
+        ):
+            logger.info(
+                "Best move known after %d iterations, %d saved",
+                iteration,
+                iterations - iteration,
+            )
+            return iteration, iterations - iteration
+        if (
+            max_nodes is not None
+            and len(node_table) > max_nodes - MAX_NODES_PER_ITERATION
+        ):
+            n_removed = node_table.prune(int(max_nodes * PRUNED_SIZE))
+            logger.debug("%d nodes pruned", n_removed)
+        is_current = False  # which player is playing
 
         # We keep a list of the nodes we explore at each iteration
         # so that at the end we can backtrack the scores and UCT evaluation
-        iteration_nodes = list([root_node])
+        iteration_nodes = list([ROOT])
+        # and the moves played, to undo them at the end
+        iteration_moves: list[Move] = list()
+        # frame of the children of the last node, see transposition
+        frame = IDENTITY
         # The reward is higher if the game ends sooner
         depth_reward = 16
-        node_to_explore = None
+        node_to_explore = ROOT
+        leaf_rewards = None
+        if virtual_loss:
+            node_table.visits[ROOT] += 1
 
         while 1:
             is_current = not is_current
             player = tmp_player if is_current else tmp_other
-            game_is_over, node_to_explore = _explore_node(
-                game_tree=game_tree,
-                board=tmp_board,
-                player=player,
-                all_possible_moves=all_possible_moves,
-            )
-            if node_to_explore is not None:
-                iteration_nodes.append(node_to_explore)
+            if (
+                transpositions
+                and len(iteration_nodes) <= TRANSPOSITION_DEPTH
+                and not node_table.is_expanded(iteration_nodes[-1])
+            ):
+                frame = node_table.find_position(
+                    node=iteration_nodes[-1],
+                    board=tmp_board,
+                    current_player=player,
+                    other_player=tmp_other if is_current else tmp_player,
+                    frame=frame,
+                )
+            try:
+                game_is_over, node_to_explore, move = _explore_node(
+                    node_table=node_table,
+                    node=iteration_nodes[-1],
+                    board=tmp_board,
+                    player=player,
+                    all_possible_moves=all_possible_moves,
+                    virtual_loss=virtual_loss,
+                    frame=frame,
+                )
+            except NodeTableFull:
+                # the tree does not grow anymore (a shared table cannot be
+                # pruned): finish the game with a random rollout instead
+                if not table_full:
+                    table_full = True
+                    logger.info(
+                        "Node table full after %d iterations, the next ones"
+                        " end with a random rollout",
+                        iteration,
+                    )
+                leaf_rewards = _rollout_rewards(
+                    board=tmp_board,
+                    current_player=player,
+                    other_player=tmp_other if is_current else tmp_player,
+                    use_depth=use_depth,
+                    # the reward of the node, as for the rollout below
+                    depth_reward=depth_reward + 1,
+                )
+                break
+            if node_to_explore is None:
+                # the player to play cannot move: the other one wins
+                node_table.proven[iteration_nodes[-1]] = PROVEN_WIN
+                break
+            iteration_nodes.append(node_to_explore)
+            iteration_moves.append(move)
+            if transpositions:
+                frame = compose(frame, node_table.links[node_to_explore])
             if game_is_over:
+                node_table.proven[node_to_explore] = PROVEN_WIN
+            if node_table.proven[node_to_explore] != UNPROVEN:
+                break
+            if playouts and node_table.visits[node_to_explore] == 0:
+                # New node: random games from there instead of going down
+                leaf_rewards = _playout_rewards(
+                    board=tmp_board,
+                    current_player=tmp_other if is_current else tmp_player,
+                    other_player=player,
+                    playouts=playouts,
+                    use_depth=use_depth,
+                    depth_reward=depth_reward,
+                    rng=rng,
+                )
+                break
+            if rollout and node_table.visits[node_to_explore] == (
+                1 if virtual_loss else 0
+            ):
+                leaf_rewards = _rollout_rewards(
+                    board=tmp_board,
+                    current_player=tmp_other if is_current else tmp_player,
+                    other_player=player,
+                    use_depth=use_depth,
+                    depth_reward=depth_reward,
+                )
                 break
             depth_reward -= 1
 
-        # Backtrack the scores and iterations
-        reward = None
-        if node_to_explore is None:
-            # current_player loses
-            reward = 0
+        # Backtrack the scores and iterations: reward of the last node,
+        # then alternately of its parents
+        if leaf_rewards is not None:
+            rewards, n_visits = leaf_rewards
         else:
-            # current_player wins
-            reward = 1
-        if use_depth:
-            reward = reward * depth_reward
+            n_visits = 1
+            if (
+                node_to_explore is not None
+                and node_table.proven[node_to_explore] == PROVEN_LOSS
+            ):
+                # the player of the last move loses
+                rewards = [0, 1]
+            else:
+                # the player of the last move wins, also when the other
+                # one cannot move (see PROVEN_WIN above)
+                rewards = [1, 0]
+            if use_depth:
+                rewards = [reward * depth_reward for reward in rewards]
+            # the parents of a proven node may be proven in turn
+            for node in reversed(iteration_nodes[:-1]):
+                if not node_table.solve(node):
+                    break
 
         while len(iteration_nodes) > 0:
             node = iteration_nodes.pop()
-            game_tree.update(node=node, reward=reward)
-            is_current = not is_current
-            if reward == 0:
-                reward = 1
-                if use_depth:
-                    reward = depth_reward
+            if virtual_loss:
+                # the visit has been counted on the way down
+                node_table.scores[node] += rewards[0]
             else:
-                reward = 0
-    if multiprocess_list is not None:
-        multiprocess_list.append(game_tree.get(depth=len(frozen_board)))
-    return game_tree
+                node_table.update(
+                    node=node, reward=rewards[0], n_visits=n_visits
+                )
+            rewards.reverse()
+        # Go back up to the root position
+        for move in reversed(iteration_moves):
+            _undo_move(move, tmp_board, tmp_player, tmp_other)
+    return iterations, 0
+
+
+def _root_is_decided(
+    node_table: NodeTable, remaining_visits: int, max_reward: int
+) -> bool:
+    """Whether the most visited child of the root is the best move:
+    the other children cannot catch up with its visits in the remaining
+    ones, or its confidence interval is above theirs (Hoeffding's
+    inequality with EARLY_STOP_RISK, the rewards of a visit being
+    between 0 and max_reward).
+    """
+    stats = sorted(
+        (
+            (node_table.visits[child], node_table.scores[child])
+            for child in node_table.children(ROOT)
+        ),
+        reverse=True,
+    )
+    if len(stats) < 2:
+        return True
+    (best_visits, best_score), others = stats[0], stats[1:]
+    if best_visits - others[0][0] > remaining_visits:
+        return True
+    if others[-1][0] == 0:
+        return False
+
+    def bound(visits: int) -> float:
+        return max_reward * math.sqrt(
+            math.log(2 / EARLY_STOP_RISK) / (2 * visits)
+        )
+
+    lower = best_score / best_visits - bound(best_visits)
+    return all(
+        score / visits + bound(visits) < lower for visits, score in others
+    )
+
+
+def _playout_rewards(
+    board: Board,
+    current_player: Player,
+    other_player: Player,
+    playouts: int,
+    use_depth: bool,
+    depth_reward: int,
+    rng: np.random.Generator,
+) -> tuple[list[int], int]:
+    """Rewards of the random games from the board, summed for the last
+    move (played by other_player) then for current_player, and the
+    number of games.
+    """
+    current_wins, n_moves = random_playouts(
+        board=board,
+        current_player=current_player,
+        other_player=other_player,
+        n=playouts,
+        rng=rng,
+    )
+    rewards = np.full(playouts, 1, dtype=np.int64)
+    if use_depth:
+        # the reward is the depth_reward of the last move of the game
+        rewards = depth_reward - n_moves
+    return [
+        int(rewards[~current_wins].sum()),
+        int(rewards[current_wins].sum()),
+    ], playouts
+
+
+def _rollout_rewards(
+    board: Board,
+    current_player: Player,
+    other_player: Player,
+    use_depth: bool,
+    depth_reward: int,
+) -> tuple[list[int], int]:
+    """Same as _playout_rewards for one random game, played on the board
+    and taken back.
+    """
+    players = (current_player, other_player)
+    moves: list[Move] = list()
+    while 1:
+        player = players[len(moves) % 2]
+        possible_moves = list(
+            board.get_possible_moves(player.pawns, player.color)
+        )
+        if not possible_moves:
+            # the player to play loses
+            other_wins = player is current_player
+            break
+        move = random.choice(possible_moves)
+        moves.append(move)
+        player.remove(move.pawn)
+        if board.play(move, strict=False):
+            other_wins = player is other_player
+            break
+    reward = depth_reward - len(moves) if use_depth else 1
+    for idx in reversed(range(len(moves))):
+        board.undo(moves[idx])
+        players[idx % 2].add(moves[idx].pawn)
+    return ([reward, 0] if other_wins else [0, reward]), 1
+
+
+def _undo_move(
+    move: Move, board: Board, current_player: Player, other_player: Player
+):
+    board.undo(move)
+    if move.color == current_player.color:
+        current_player.add(move.pawn)
+    else:
+        other_player.add(move.pawn)
+
+
+def _root_parallel_worker(
+    idx: int,
+    table_name: str,
+    capacity: int,
+    board: Board,
+    current_player: Player,
+    other_player: Player,
+    iterations: int,
+    use_depth: bool,
+    all_possible_moves: bool,
+    deadline: float | None = None,
+    rollout: bool = False,
+    max_nodes: int | None = None,
+) -> tuple[int, int]:
+    """Search in the shared node table, returns idx and the number
+    of iterations done.
+    """
+    node_table = SharedNodeTable(capacity=capacity, name=table_name)
+    node_table.set_range(1, capacity)
+    random.seed()
+    try:
+        n_iterations, _ = _search(
+            node_table=node_table,
+            board=board,
+            current_player=current_player,
+            other_player=other_player,
+            iterations=iterations,
+            use_depth=use_depth,
+            all_possible_moves=all_possible_moves,
+            deadline=deadline,
+            rollout=rollout,
+            max_nodes=max_nodes,
+        )
+        return idx, n_iterations
+    finally:
+        node_table.close()
+
+
+def _tree_parallel_worker(
+    table_name: str,
+    capacity: int,
+    first_node: int,
+    end_node: int,
+    board: Board,
+    current_player: Player,
+    other_player: Player,
+    iterations: int,
+    use_depth: bool,
+    all_possible_moves: bool,
+    deadline: float | None = None,
+    rollout: bool = False,
+) -> int:
+    node_table = SharedNodeTable(capacity=capacity, name=table_name)
+    node_table.set_range(first_node, end_node)
+    random.seed()
+    try:
+        n_iterations, _ = _search(
+            node_table=node_table,
+            board=board,
+            current_player=current_player,
+            other_player=other_player,
+            iterations=iterations,
+            use_depth=use_depth,
+            all_possible_moves=all_possible_moves,
+            virtual_loss=True,
+            deadline=deadline,
+            rollout=rollout,
+        )
+        return n_iterations
+    finally:
+        node_table.close()
+
+
+def _tree_parallel_algo(
+    board: Board,
+    current_player: Player,
+    other_player: Player,
+    iterations: int,
+    use_depth: bool,
+    all_possible_moves: bool,
+    num_process: int,
+    max_depth: int | None = None,
+    deadline: float | None = None,
+    rollout: bool = False,
+    max_nodes: int | None = None,
+) -> GameTree:
+    """Tree parallelization: the processes run their iterations on the
+    same tree, virtual loss makes them explore different nodes.
+
+    The tree cannot be pruned: once the share of a process of the
+    max_nodes nodes, or of SHARED_MEMORY, is full, its iterations end with
+    a random rollout instead of expanding nodes.
+    """
+    # the root and its children are created here, before the workers start
+    n_first_nodes = 1 + len(bitboard.PAWNS) * bitboard.N_CELLS
+    nodes_per_process = MIN_NODES + iterations * (
+        ROLLOUT_NODES_PER_ITERATION if rollout else NODES_PER_ITERATION
+    )
+    if max_nodes is None:
+        max_nodes = math.inf
+    max_nodes = min(max_nodes, SHARED_MEMORY // NODE_SIZE)
+    nodes_per_process = min(
+        nodes_per_process, (max_nodes - n_first_nodes) // num_process
+    )
+    capacity = n_first_nodes + num_process * nodes_per_process
+    node_table = SharedNodeTable(capacity=capacity)
+    try:
+        node_table.set_range(1, n_first_nodes)
+        possible_moves = list(
+            board.get_possible_moves(
+                current_player.pawns,
+                current_player.color,
+                optimize=not all_possible_moves,
+            )
+        )
+        random.shuffle(possible_moves)
+        node_table.expand(ROOT, possible_moves)
+
+        args_list = list()
+        for idx in range(num_process):
+            first_node = n_first_nodes + idx * nodes_per_process
+            args_list.append(
+                (
+                    node_table.name,
+                    capacity,
+                    first_node,
+                    first_node + nodes_per_process,
+                    board,
+                    current_player,
+                    other_player,
+                    iterations,
+                    use_depth,
+                    all_possible_moves,
+                    deadline,
+                    rollout,
+                )
+            )
+        # no retry: a dead worker may leave the shared tree inconsistent
+        n_iterations = run_in_pool(
+            _tree_parallel_worker, args_list, retry=False
+        )
+        game_tree = node_table.to_game_tree(
+            board.get_code(), max_depth=max_depth
+        )
+        game_tree.iterations = sum(n_iterations)
+        return game_tree
+    finally:
+        node_table.close(unlink=True)
 
 
 def _montecarlo_algo(
@@ -145,6 +660,13 @@ def _montecarlo_algo(
     use_depth: bool,
     all_possible_moves: bool = False,
     num_process: int = NUM_PROCESS,
+    max_depth: int | None = None,
+    parallelization: str = PARALLELIZATION,
+    time_budget: float | None = None,
+    transpositions: bool = False,
+    rollout: bool = False,
+    max_nodes: int | None = None,
+    early_stop: bool = False,
 ) -> GameTree:
     """Execute the montecarlo algorithm, up to generating the 'game tree' i.e. the graph of the moves with their scores.
     Args:
@@ -154,10 +676,106 @@ def _montecarlo_algo(
         iterations (int): _description_
         use_depth (bool): _description_
         all_possible_moves (bool, optional): whether to consider redundant moves or not (eg by exploiting board symmetry). Defaults to False.
+        max_depth (int | None, optional): keep only the nodes with up to
+            max_depth more pawns than the board. Defaults to None (all of
+            them).
+        parallelization (str, optional): ROOT_PARALLEL or TREE_PARALLEL, used
+            when num_process > 1, or LEAF_PARALLEL to play LEAF_PLAYOUTS
+            vectorized random games from each new node, in this process.
+            Defaults to PARALLELIZATION.
+        time_budget (float | None, optional): stop the iterations after that
+            many seconds. Defaults to None (no limit).
+        transpositions (bool, optional): in a single process, share the
+            statistics of the equivalent positions (same board by another
+            sequence of moves, or symmetric board). Defaults to False.
+        rollout (bool, optional): expand one node per iteration and finish the
+            game with a random rollout that is not stored, instead of adding
+            all the nodes down to the end of the game. Not with LEAF_PARALLEL.
+            Defaults to False.
+        max_nodes (int | None, optional): nodes of the tree of a process,
+            the least visited ones are pruned to stay under it (of the shared
+            tree with TREE_PARALLEL, that stops growing instead). At least
+            MIN_MAX_NODES, not with transpositions. Defaults to None (no
+            limit).
+        early_stop (bool, optional): in a single process, stop the iterations
+            once the most visited move cannot be overtaken or is better than
+            the others with high confidence. Defaults to False.
 
     Returns:
-        GameTree: _description_
+        GameTree: _description_, with the number of iterations done
     """
+    deadline = None
+    if time_budget is not None:
+        deadline = time.time() + time_budget
+    game_tree = _run_algo(
+        board=board,
+        current_player=current_player,
+        other_player=other_player,
+        iterations=iterations,
+        use_depth=use_depth,
+        all_possible_moves=all_possible_moves,
+        num_process=num_process,
+        max_depth=max_depth,
+        parallelization=parallelization,
+        deadline=deadline,
+        transpositions=transpositions,
+        rollout=rollout,
+        max_nodes=max_nodes,
+        early_stop=early_stop,
+    )
+    logger.info(
+        "%d Monte Carlo iterations on a board with %d pawns",
+        game_tree.iterations,
+        len(board),
+    )
+    return game_tree
+
+
+def _run_algo(
+    board: Board,
+    current_player: Player,
+    other_player: Player,
+    iterations: int,
+    use_depth: bool,
+    all_possible_moves: bool,
+    num_process: int,
+    max_depth: int | None,
+    parallelization: str,
+    deadline: float | None,
+    transpositions: bool = False,
+    rollout: bool = False,
+    max_nodes: int | None = None,
+    early_stop: bool = False,
+) -> GameTree:
+    if max_nodes is not None and max_nodes < MIN_MAX_NODES:
+        raise ValueError(f"max_nodes must be at least {MIN_MAX_NODES}.")
+    if transpositions and max_nodes is not None:
+        # the shared children cannot be pruned (see
+        # TranspositionNodeTable.subtree)
+        raise ValueError("max_nodes is not supported with transpositions.")
+    one_process = parallelization == LEAF_PARALLEL or num_process == 1
+    if transpositions and not one_process:
+        raise ValueError("transpositions need a single process.")
+    if early_stop and not one_process:
+        raise ValueError("early_stop needs a single process.")
+    if rollout and parallelization == LEAF_PARALLEL:
+        # a new node gets LEAF_PLAYOUTS random games already
+        raise ValueError("rollout is not supported with LEAF_PARALLEL.")
+    if parallelization == LEAF_PARALLEL:
+        return _one_process_algo(
+            board=board,
+            current_player=current_player,
+            other_player=other_player,
+            iterations=iterations,
+            use_depth=use_depth,
+            all_possible_moves=all_possible_moves,
+            max_depth=max_depth,
+            playouts=LEAF_PLAYOUTS,
+            deadline=deadline,
+            transpositions=transpositions,
+            max_nodes=max_nodes,
+            early_stop=early_stop,
+        )
     if num_process == 1:
         return _one_process_algo(
             board=board,
@@ -166,30 +784,75 @@ def _montecarlo_algo(
             iterations=iterations,
             use_depth=use_depth,
             all_possible_moves=all_possible_moves,
+            max_depth=max_depth,
+            deadline=deadline,
+            transpositions=transpositions,
+            rollout=rollout,
+            max_nodes=max_nodes,
+            early_stop=early_stop,
+        )
+    if parallelization == TREE_PARALLEL:
+        return _tree_parallel_algo(
+            board=board,
+            current_player=current_player,
+            other_player=other_player,
+            iterations=iterations,
+            use_depth=use_depth,
+            all_possible_moves=all_possible_moves,
+            num_process=num_process,
+            max_depth=max_depth,
+            deadline=deadline,
+            rollout=rollout,
+            max_nodes=max_nodes,
         )
-    manager = multiprocessing.Manager()
-    multiprocess_list = manager.list()
-    jobs = list()
-    for _ in range(num_process):
-        p = multiprocessing.Process(
-            target=_one_process_algo,
-            args=(
+    # Root parallelization: independent searches in the worker processes,
+    # each one in its own node table in shared memory, read from here.
+    # Only the first level of the trees is kept (unless asked). A process
+    # prunes its tree when its table is full, instead of stopping.
+    capacity = min(
+        MIN_NODES
+        + iterations
+        * (ROLLOUT_NODES_PER_ITERATION if rollout else NODES_PER_ITERATION),
+        SHARED_MEMORY // (num_process * NODE_SIZE),
+    )
+    if max_nodes is not None:
+        capacity = min(capacity, max_nodes)
+    node_tables: list[SharedNodeTable] = list()
+    try:
+        for _ in range(num_process):
+            node_tables.append(SharedNodeTable(capacity=capacity))
+        args_list = [
+            (
+                idx,
+                node_table.name,
+                capacity,
                 board,
                 current_player,
                 other_player,
                 iterations,
                 use_depth,
                 all_possible_moves,
-                multiprocess_list,
-            ),
-        )
-        jobs.append(p)
-        p.start()
-
-    for proc in jobs:
-        proc.join()
-
-    return GameTree.sum(list(multiprocess_list))
+                deadline,
+                rollout,
+                capacity,
+            )
+            for idx, node_table in enumerate(node_tables)
+        ]
+        game_tree = GameTree()
+        for idx, n_iterations in imap_in_pool(
+            _root_parallel_worker, args_list
+        ):
+            game_tree.iterations += n_iterations
+            node_tables[idx].to_game_tree(
+                board.get_code(),
+                max_depth=0 if max_depth is None else max_depth,
+                game_tree=game_tree,
+            )
+        game_tree.compute_uct()
+        return game_tree
+    finally:
+        for node_table in node_tables:
+            node_table.close(unlink=True)
 
 
 def get_best_move(
@@ -200,6 +863,11 @@ def get_best_move(
     use_depth: bool = USE_DEPTH,
     num_process=NUM_PROCESS,
     game_tree_folder: pathlib.Path | None = None,
+    parallelization: str = PARALLELIZATION,
+    time_budget: float | None = None,
+    transpositions: bool = False,
+    rollout: bool = False,
+    early_stop: bool = False,
 ) -> Move | None:
     """http://www.incompleteideas.net/609%20dropbox/other%20readings%20and%20resources/MCTS-survey.pdf
     Upper Confidence Bounds for Trees (UCT)
@@ -231,6 +899,17 @@ def get_best_move(
         other_player (Player): _description_
         iterations (int, optional): _description_. Defaults to 500.
         use_depth (bool, optional): Victory score is better if fewer moves are needed (between 16 and 1). Defaults to True
+        time_budget (float | None, optional): stop the search after that many
+            seconds, even if the iterations are not all done. Defaults to None.
+        transpositions (bool, optional): with num_process=1, share the
+            statistics of the equivalent positions. Defaults to False.
+        rollout (bool, optional): expand one node per iteration and finish the
+            game with a random rollout, uses much less memory. Defaults to
+            False.
+        early_stop (bool, optional): with num_process=1, stop the search once
+            the best move is known: the other moves cannot catch up with its
+            visits, or its score is above theirs with high confidence. Defaults
+            to False.
 
     Returns:
         tuple[float, Move]: _description_
@@ -251,6 +930,13 @@ def get_best_move(
             iterations=iterations,
             use_depth=use_depth,
             num_process=num_process,
+            parallelization=parallelization,
+            time_budget=time_budget,
+            transpositions=transpositions,
+            rollout=rollout,
+            early_stop=early_stop,
+            # only the children of the root are needed
+            max_depth=0,
         )
 
     return game_tree.get_best_move(frozen_board)
@@ -265,6 +951,10 @@ def get_move_stats(
     use_depth: bool = USE_DEPTH,
     num_process: int = NUM_PROCESS,
     game_tree_folder: pathlib.Path | None = None,
+    parallelization: str = PARALLELIZATION,
+    time_budget: float | None = None,
+    transpositions: bool = False,
+    rollout: bool = False,
 ) -> list[tuple[Move, MonteCarloScore]]:
     frozen_board = board.get_frozen()  # hashable version of the board
     game_tree = None
@@ -282,6 +972,10 @@ def get_move_stats(
             iterations=iterations,
             use_depth=use_depth,
             num_process=num_process,
+            parallelization=parallelization,
+            time_budget=time_budget,
+            transpositions=transpositions,
+            rollout=rollout,
         )
     return game_tree.get_move_stats(frozen_board=frozen_board, depth=depth)
 
@@ -295,6 +989,10 @@ def get_best_play(
     use_depth: bool = USE_DEPTH,
     num_process: int = NUM_PROCESS,
     game_tree_folder: pathlib.Path | None = None,
+    parallelization: str = PARALLELIZATION,
+    time_budget: float | None = None,
+    transpositions: bool = False,
+    rollout: bool = False,
 ) -> list[tuple[Node, MonteCarloScore]]:
 
     frozen_board = board.get_frozen()  # hashable version of the board
@@ -313,6 +1011,10 @@ def get_best_play(
             iterations=iterations,
             use_depth=use_depth,
             num_process=num_process,
+            parallelization=parallelization,
+            time_budget=time_budget,
+            transpositions=transpositions,
+            rollout=rollout,
         )
     return game_tree.get_best_play(
         frozen_board=frozen_board,
@@ -330,6 +1032,8 @@ def generate_tree(
     iterations: int = ITERATIONS,
     use_depth: bool = USE_DEPTH,
     num_process=NUM_PROCESS,
+    rollout: bool = False,
+    max_nodes: int | None = None,
 ) -> None:
     """Generate the MonteCarlo algorithm game tree and
     save it to a file.
@@ -343,6 +1047,12 @@ def generate_tree(
         max_depth (int, optional): max depth of the game tree that is saved. Defaults to GAME_TREE_FILE_MAX_DEPTH.
         iterations (int, optional): MonteCarlo algorithm parameter: number of iterations. Defaults to ITERATIONS.
         use_depth (bool, optional): MonteCarlo algorithm parameter: reward depends on the depth. Defaults to USE_DEPTH.
+        rollout (bool, optional): MonteCarlo algorithm parameter: one new node
+            per iteration, for many more iterations in the same memory.
+            Defaults to False.
+        max_nodes (int | None, optional): MonteCarlo algorithm parameter: nodes
+            of the tree of each process, the least visited are pruned to stay
+            under it, at least MIN_MAX_NODES. Defaults to None (no limit).
     """
     # whether we use all possible moves or remove the redundant ones
     all_possible_moves = not (
@@ -356,6 +1066,10 @@ def generate_tree(
         use_depth=use_depth,
         all_possible_moves=all_possible_moves,
         num_process=num_process,
+        rollout=rollout,
+        max_nodes=max_nodes,
+        # the file does not keep the nodes with max_depth pawns or more
+        max_depth=max_depth - len(board) - 1,
     )
     game_tree.to_file(
         path=path, player_color=main_player_color, max_depth=max_depth
@@ -1,6 +1,39 @@
 from dataclasses import dataclass
 
-from quantikai.game import FrozenBoard, Move
+from quantikai.game import FrozenBoard, Move, bitboard
+
+# Packed node: the board code (FrozenBoard.code), then 8 bits for the
+# move code (Move.code, < 128) or NO_MOVE for the root of a search.
+MOVE_BITS = 8
+MOVE_MASK = (1 << MOVE_BITS) - 1
+NO_MOVE = 1 << 7
+
+
+def pack_node(board_code: int, move: Move | None = None) -> int:
+    return (board_code << MOVE_BITS) | (NO_MOVE if move is None else move.code)
+
+
+def child_board_code(board_code: int, move_code: int) -> int:
+    """Board code after playing the move, see FrozenBoard.code"""
+    return board_code | (
+        (1 + (move_code & 7))
+        << (4 * (bitboard.N_CELLS - 1 - (move_code >> 3)))
+    )
+
+
+def count_pawns(node_code: int) -> int:
+    """Number of pawns on the board of the node"""
+    board_code = node_code >> MOVE_BITS
+    count = 0
+    while board_code:
+        count += (board_code & 0xF) != 0
+        board_code >>= 4
+    return count
+
+
+def unpack_move(node_code: int) -> Move | None:
+    move_code = node_code & MOVE_MASK
+    return None if move_code == NO_MOVE else Move.from_code(move_code)
 
 
 @dataclass(frozen=True, eq=True)
@@ -23,6 +56,17 @@ class Node:
             ),
         }
 
+    @property
+    def code(self) -> int:
+        return pack_node(self.board.code, self.move_to_play)
+
+    @classmethod
+    def from_code(cls, code: int) -> "Node":
+        return cls(
+            board=FrozenBoard.from_code(code >> MOVE_BITS),
+            move_to_play=unpack_move(code),
+        )
+
     def to_compressed(self):
         return [
             self.board.to_compressed(),
@@ -0,0 +1,425 @@
+"""Monte Carlo search tree stored in flat arrays, indexed by node id.
+
+A node is the move played from the position of its parent, the root
+(id 0) has no move. The children of a node have consecutive ids, from
+first_child to first_child + n_children - 1.
+
+A node is proven (PROVEN_WIN or PROVEN_LOSS for the player of its move)
+when the game is over after its move, or when its children prove it:
+one of them is a win for the other player, or all of them are losses.
+"""
+
+import array
+import math
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from quantikai.bot.montecarlo.game_tree import GameTree
+from quantikai.bot.montecarlo.node import (
+    MOVE_BITS,
+    NO_MOVE,
+    child_board_code,
+    pack_node,
+)
+from quantikai.bot.montecarlo.score import (
+    DEFAULT_UCT,
+    PROVEN_LOSS,
+    PROVEN_WIN,
+    UCT_CST,
+    UNPROVEN,
+)
+from quantikai.game.move import MOVES, Move
+
+ROOT = 0
+NOT_EXPANDED = -1
+_COLUMNS = (
+    ("visits", "q"),
+    ("scores", "q"),
+    ("first_child", "q"),
+    ("n_children", "B"),
+    ("moves", "B"),
+    ("parents", "q"),
+    ("proven", "b"),
+)
+# Bytes of a node, e.g. in shared memory
+NODE_SIZE = sum(array.array(typecode).itemsize for _, typecode in _COLUMNS)
+# From that many children, select_child scores them with NumPy: below,
+# the overhead of the NumPy calls is more than the Python loop
+VECTORIZED_CHILDREN = 24
+# sqrt(2 * log(parent visits)) of the exploration term, for the first
+# visit counts
+_SQRT_2_LOG = np.sqrt(2 * np.log(np.maximum(np.arange(1 << 16), 1)))
+
+
+class NodeTableFull(Exception):
+    pass
+
+
+class NodeTable:
+    """The visits and scores of the nodes, and the links between them.
+
+    Each column is an array with one item per node id, the tree
+    grows by doubling their capacity.
+    """
+
+    visits: array.array
+    scores: array.array
+    first_child: array.array
+    n_children: array.array
+    moves: array.array
+    parents: array.array
+    proven: array.array
+    # (name, array typecode) of the columns
+    _columns = _COLUMNS
+
+    def __init__(self, capacity: int = 1024):
+        for name, typecode in self._columns:
+            setattr(self, name, array.array(typecode))
+        self.size = 0
+        self.capacity = 0
+        self._grow(capacity)
+        self._allocate(1)
+        self.moves[ROOT] = NO_MOVE
+        self.parents[ROOT] = NOT_EXPANDED
+
+    def __len__(self):
+        return self.size
+
+    def _grow(self, capacity: int):
+        for name, _ in self._columns:
+            column = getattr(self, name)
+            column.frombytes(
+                bytes(column.itemsize * (capacity - self.capacity))
+            )
+        self.capacity = capacity
+
+    def _allocate(self, count: int) -> int:
+        """Reserve count new ids, returns the first one"""
+        first = self.size
+        end = self.size = first + count
+        if end > self.capacity:
+            self._grow(max(end, 2 * self.capacity))
+        self.first_child[first:end] = array.array("q", [NOT_EXPANDED]) * count
+        return first
+
+    def is_expanded(self, node: int) -> bool:
+        return self.first_child[node] != NOT_EXPANDED
+
+    def expand(self, node: int, moves: list[Move]):
+        """Add one child per move, with no visit"""
+        first = self._allocate(len(moves))
+        end = first + len(moves)
+        self.moves[first:end] = array.array("B", [m.code for m in moves])
+        self.parents[first:end] = array.array("q", [node]) * len(moves)
+        # first_child last: other processes may be reading a shared table
+        self.n_children[node] = len(moves)
+        self.first_child[node] = first
+
+    def children(self, node: int) -> range:
+        first = self.first_child[node]
+        if first == NOT_EXPANDED:
+            return range(0)
+        return range(first, first + self.n_children[node])
+
+    def move(self, node: int) -> Move | None:
+        code = self.moves[node]
+        return None if code == NO_MOVE else MOVES[code]
+
+    def update(self, node: int, reward: int, n_visits: int = 1):
+        self.visits[node] += n_visits
+        self.scores[node] += reward
+
+    def uct(self, node: int, uct_cst: float = UCT_CST) -> float:
+        visits = self.visits[node]
+        if visits == 0:
+            return DEFAULT_UCT
+        parent_visits = max(self.visits[self.parents[node]], 1)
+        return self.scores[node] / visits + 2 * uct_cst * math.sqrt(
+            2 * math.log(parent_visits) / visits
+        )
+
+    def select_child(self, node: int, uct_cst: float = UCT_CST) -> int | None:
+        """Child with the best trade-off exploration/exploitation,
+        the last one on ties. None if the node has no child.
+
+        A proven win is chosen right away, proven losses only if all the
+        children are. From VECTORIZED_CHILDREN children, none of them
+        proven, they are scored with NumPy.
+        """
+        first = self.first_child[node]
+        end = first + self.n_children[node]
+        visits = self.visits
+        scores = self.scores
+        proven = self.proven
+        if end - first >= VECTORIZED_CHILDREN and not any(proven[first:end]):
+            return self._select_child_vectorized(node, uct_cst)
+        exploration = 2 * uct_cst
+        log_parent = math.log(visits[node]) if visits[node] else 0.0
+        best = None
+        best_uct = None
+        for child in range(first, end):
+            if proven[child] == PROVEN_WIN:
+                return child
+            if proven[child] == PROVEN_LOSS:
+                if best is None:
+                    best = child
+                continue
+            n = visits[child]
+            if n == 0:
+                uct = DEFAULT_UCT
+            else:
+                uct = scores[child] / n + exploration * math.sqrt(
+                    2 * log_parent / n
+                )
+            if best_uct is None or uct >= best_uct:
+                best = child
+                best_uct = uct
+        return best
+
+    def _select_child_vectorized(self, node: int, uct_cst: float) -> int:
+        """select_child of a node with no proven child, all its children
+        scored at once: uct = (score + k * sqrt(visits)) / visits with
+        k = 2 * uct_cst * sqrt(2 * log(parent visits)).
+        """
+        first = self.first_child[node]
+        n = self.n_children[node]
+        visits = np.frombuffer(
+            self.visits, np.int64, n, first * self.visits.itemsize
+        )
+        # the last one on ties: argmin and argmax of the reversed arrays
+        last = first + n - 1
+        least_visited = int(visits[::-1].argmin())
+        if visits[n - 1 - least_visited] == 0:
+            # DEFAULT_UCT
+            return last - least_visited
+        scores = np.frombuffer(
+            self.scores, np.int64, n, first * self.scores.itemsize
+        )
+        parent_visits = self.visits[node]
+        if parent_visits < len(_SQRT_2_LOG):
+            sqrt_2_log = _SQRT_2_LOG[parent_visits]
+        else:
+            sqrt_2_log = math.sqrt(2 * math.log(parent_visits))
+        uct = (scores + 2 * uct_cst * sqrt_2_log * np.sqrt(visits)) / visits
+        return last - int(uct[::-1].argmax())
+
+    def solve(self, node: int) -> bool:
+        """Prove the node from its children if they allow it,
+        returns whether the node is proven.
+        """
+        if self.proven[node] == UNPROVEN and self.is_expanded(node):
+            children = self.children(node)
+            first, end = children.start, children.stop
+            results = self.proven[first:end]
+            if PROVEN_WIN in results:
+                self.proven[node] = PROVEN_LOSS
+            elif all(result == PROVEN_LOSS for result in results):
+                self.proven[node] = PROVEN_WIN
+        return self.proven[node] != UNPROVEN
+
+    def subtree(
+        self,
+        node: int,
+        expanded: set[int] | None = None,
+        capacity: int = 1024,
+    ) -> "NodeTable":
+        """Copy of the tree below node, node being the new root.
+        With expanded, only the children of these nodes are copied.
+        """
+        node_table = NodeTable(capacity=capacity)
+        node_table.visits[ROOT] = self.visits[node]
+        node_table.scores[ROOT] = self.scores[node]
+        node_table.proven[ROOT] = self.proven[node]
+        # (id in this table, id in the new one), in the order of creation
+        queue = [(node, ROOT)]
+        for old, new in queue:
+            if not self.is_expanded(old) or (
+                expanded is not None and old not in expanded
+            ):
+                continue
+            children = self.children(old)
+            start, stop = children.start, children.stop
+            first = node_table._allocate(len(children))
+            end = first + len(children)
+            for name in ("visits", "scores", "moves", "proven"):
+                column = getattr(node_table, name)
+                # array from a slice of this table, an array or memoryview
+                column[first:end] = array.array(
+                    column.typecode,
+                    getattr(self, name)[start:stop],
+                )
+            node_table.parents[first:end] = array.array("q", [new]) * len(
+                children
+            )
+            node_table.first_child[new] = first
+            node_table.n_children[new] = len(children)
+            queue.extend(zip(children, range(first, end)))
+        return node_table
+
+    def prune(self, max_nodes: int) -> int:
+        """Keep the children of the most visited nodes only, for the tree
+        to have at most max_nodes nodes (but the root and its children).
+        The other nodes are not expanded anymore and keep their visits
+        and scores. The ids of the nodes change.
+
+        Returns:
+            int: number of nodes removed
+        """
+        size = len(self)
+        # the least visits of the nodes from the root to each node: the
+        # deep nodes go first, never before their parents
+        path_visits = array.array("q", self.visits[:size])
+        expanded = list()
+        for node in range(size):
+            if node != ROOT:
+                # the parents are created before their children
+                path_visits[node] = min(
+                    path_visits[node], path_visits[self.parents[node]]
+                )
+            if self.is_expanded(node):
+                expanded.append(node)
+        expanded.sort(key=path_visits.__getitem__, reverse=True)
+
+        n_nodes = 1
+        kept = set()
+        for node in expanded:
+            n_nodes += self.n_children[node]
+            if n_nodes > max_nodes and node != ROOT:
+                break
+            kept.add(node)
+        self._replace(self.subtree(ROOT, kept, capacity=self.capacity))
+        return size - len(self)
+
+    def _replace(self, node_table: "NodeTable"):
+        for name, _ in self._columns:
+            setattr(self, name, getattr(node_table, name))
+        self.size = node_table.size
+        self.capacity = node_table.capacity
+
+    def to_game_tree(
+        self,
+        board_code: int,
+        max_depth: int | None = None,
+        game_tree: GameTree | None = None,
+    ) -> GameTree:
+        """GameTree of the search started on the board.
+
+        Args:
+            board_code (int): code of the board of the root
+            max_depth (int | None): keep the nodes whose board has at
+                most max_depth more pawns than the root board
+            game_tree (GameTree | None): add the visits and scores to this
+                tree instead of a new one, call its compute_uct at the end
+        """
+        new_tree = game_tree is None
+        if new_tree:
+            game_tree = GameTree()
+        game_tree._add_stats(
+            pack_node(board_code),
+            self.visits[ROOT],
+            0,
+            self.scores[ROOT],
+            self.proven[ROOT],
+        )
+        # (node, code of its board, number of moves since the root)
+        queue = [(ROOT, board_code, 0)]
+        for parent, parent_board, depth in queue:
+            if max_depth is not None and depth > max_depth:
+                continue
+            for node in self.children(parent):
+                move_code = self.moves[node]
+                # the same position may be reached by another sequence of
+                # moves, the stats are added
+                game_tree._add_stats(
+                    (parent_board << MOVE_BITS) | move_code,
+                    self.visits[node],
+                    self.visits[parent],
+                    self.scores[node],
+                    self.proven[node],
+                )
+                if self.is_expanded(node):
+                    queue.append(
+                        (
+                            node,
+                            child_board_code(parent_board, move_code),
+                            depth + 1,
+                        )
+                    )
+        if new_tree:
+            game_tree.compute_uct()
+        return game_tree
+
+
+class SharedNodeTable(NodeTable):
+    """NodeTable in shared memory, for several processes to search the
+    same tree.
+
+    Its capacity is fixed. Each process allocates its nodes in its own
+    range of ids (see set_range) so that no lock is needed; the visits
+    and scores are updated without lock either, a few updates may be lost.
+    """
+
+    def __init__(self, capacity: int, name: str | None = None):
+        create = name is None
+        self._shm = shared_memory.SharedMemory(
+            name=name,
+            create=create,
+            size=sum(
+                array.array(typecode).itemsize * capacity
+                for _, typecode in self._columns
+            ),
+        )
+        offset = 0
+        # the 8-byte columns first, for them to be aligned
+        for column, typecode in sorted(
+            self._columns, key=lambda c: -array.array(c[1]).itemsize
+        ):
+            end = offset + array.array(typecode).itemsize * capacity
+            setattr(self, column, self._shm.buf[offset:end].cast(typecode))
+            offset = end
+        self.capacity = capacity
+        self.size = 0
+        self._end = capacity
+        if create:
+            self._allocate(1)
+            self.moves[ROOT] = NO_MOVE
+            self.parents[ROOT] = NOT_EXPANDED
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def set_range(self, start: int, end: int):
+        """Allocate the next nodes with ids from start to end - 1"""
+        self.size = start
+        self._end = end
+
+    def _grow(self, capacity: int):
+        raise NodeTableFull(f"No room left for {capacity} nodes.")
+
+    def _replace(self, node_table: NodeTable):
+        # copied in the shared memory, from the first id; the ids left
+        # are cleared for the next nodes to start with no visit
+        size = len(node_table)
+        old_size = self.size
+        for name, typecode in self._columns:
+            column = getattr(self, name)
+            column[:size] = getattr(node_table, name)[:size]
+            if old_size > size:
+                column[size:old_size] = array.array(
+                    typecode, bytes(column.itemsize * (old_size - size))
+                )
+        self.size = size
+
+    def _allocate(self, count: int) -> int:
+        if self.size + count > self._end:
+            raise NodeTableFull(f"No room left for {count} nodes.")
+        return super()._allocate(count)
+
+    def close(self, unlink: bool = False):
+        for column, _ in self._columns:
+            getattr(self, column).release()
+        self._shm.close()
+        if unlink:
+            self._shm.unlink()
@@ -0,0 +1,163 @@
+"""Random playouts of many games at once with NumPy.
+
+The games are stored as arrays of bitboards (see game.bitboard): one
+row per game, one column per (pawn, color). Each step plays one random
+legal move in every game still running.
+"""
+
+import numpy as np
+
+from quantikai.game import Board, Player, bitboard, symmetry
+
+N_PAWNS = len(bitboard.PAWNS)
+N_MASKS = 2 * N_PAWNS
+_BITS = 1 << np.arange(bitboard.N_CELLS, dtype=np.int64)
+_CELL_ZONES = np.array(bitboard.CELL_ZONES, dtype=np.int64)
+# rows, column and section of each cell
+_CELL_LINES = np.array(
+    [
+        [bitboard.LINE_MASKS[line] for line in lines]
+        for lines in bitboard.CELL_LINE_INDEXES
+    ],
+    dtype=np.int64,
+)
+
+
+class PlayoutBatch:
+    """n copies of a position, played until the end with random moves.
+
+    Attributes, one row per game:
+        masks: (n, 8) pawns of each (pawn, color), bitboard.mask_index
+        forbidden: (n, 8) cells forbidden to each (pawn, color)
+        occupied: (n,) occupied cells
+        counts: (n, 2, 4) pawns left per color index and pawn index
+        to_play: (n,) color index of the player to play
+        n_moves: (n,) number of moves played since the start
+        winner: (n,) color index of the winner, -1 while running
+    """
+
+    def __init__(
+        self,
+        board: Board,
+        current_player: Player,
+        other_player: Player,
+        n: int,
+        rng: np.random.Generator | None = None,
+    ):
+        self.rng = rng if rng is not None else np.random.default_rng()
+        masks = np.zeros(N_MASKS, dtype=np.int64)
+        forbidden = np.zeros(N_MASKS, dtype=np.int64)
+        for cell, value in enumerate(symmetry.unpack(board.get_code())):
+            if value:
+                masks[value - 1] |= 1 << cell
+                # same pawn, other color
+                forbidden[(value - 1) ^ 1] |= bitboard.CELL_ZONES[cell]
+        counts = np.zeros((2, N_PAWNS), dtype=np.int64)
+        for player in (current_player, other_player):
+            for pawn in player.pawns:
+                counts[
+                    bitboard.COLOR_INDEX[player.color],
+                    bitboard.PAWN_INDEX[pawn],
+                ] += 1
+
+        self.masks = np.tile(masks, (n, 1))
+        self.forbidden = np.tile(forbidden, (n, 1))
+        self.occupied = np.full(n, np.bitwise_or.reduce(masks))
+        self.counts = np.tile(counts, (n, 1, 1))
+        self.to_play = np.full(
+            n, bitboard.COLOR_INDEX[current_player.color], dtype=np.int64
+        )
+        self.n_moves = np.zeros(n, dtype=np.int64)
+        self.winner = np.full(n, -1, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.winner)
+
+    def legal_moves(self, games: np.ndarray) -> np.ndarray:
+        """(len(games), 4 * 16) legal (pawn, cell) of the player to play"""
+        color = self.to_play[games]
+        forbidden = self.forbidden[games].reshape(-1, N_PAWNS, 2)[
+            np.arange(len(games)), :, color
+        ]
+        free = ~(self.occupied[games][:, None] | forbidden) & (
+            bitboard.FULL_MASK
+        )
+        has_pawn = self.counts[games, color] > 0
+        legal = (free[:, :, None] & _BITS) != 0
+        legal &= has_pawn[:, :, None]
+        return legal.reshape(len(games), N_PAWNS * bitboard.N_CELLS)
+
+    def step(self) -> int:
+        """Play one random move in each running game.
+
+        Returns:
+            int: number of games still running
+        """
+        games = np.flatnonzero(self.winner < 0)
+        if len(games) == 0:
+            return 0
+        legal = self.legal_moves(games)
+
+        # no legal move: the player to play loses
+        stuck = ~legal.any(axis=1)
+        self.winner[games[stuck]] = 1 - self.to_play[games[stuck]]
+        games = games[~stuck]
+        legal = legal[~stuck]
+
+        # random legal move: the legal move with the highest random key
+        keys = np.where(legal, self.rng.random(legal.shape), -1.0)
+        choice = keys.argmax(axis=1)
+        pawn = choice // bitboard.N_CELLS
+        cell = choice % bitboard.N_CELLS
+        color = self.to_play[games]
+        bit = _BITS[cell]
+
+        self.masks[games, 2 * pawn + color] |= bit
+        self.occupied[games] |= bit
+        self.forbidden[games, 2 * pawn + 1 - color] |= _CELL_ZONES[cell]
+        self.counts[games, color, pawn] -= 1
+        self.n_moves[games] += 1
+
+        # win: one of the lines of the cell is full with 4 different pawns
+        lines = _CELL_LINES[cell]
+        pawns = self.masks[games, 0::2] | self.masks[games, 1::2]
+        full = (self.occupied[games][:, None] & lines) == lines
+        different = ((pawns[:, :, None] & lines[:, None, :]) != 0).all(axis=1)
+        is_win = (full & different).any(axis=1)
+        self.winner[games[is_win]] = color[is_win]
+
+        self.to_play[games] = 1 - color
+        return int((self.winner < 0).sum())
+
+    def run(self) -> np.ndarray:
+        """Play all the games until the end, returns the winners"""
+        while self.step() > 0:
+            pass
+        return self.winner
+
+
+def random_playouts(
+    board: Board,
+    current_player: Player,
+    other_player: Player,
+    n: int,
+    rng: np.random.Generator | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Play n random games from the position.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: for each game, whether
+            current_player wins and the number of moves played
+    """
+    batch = PlayoutBatch(
+        board=board,
+        current_player=current_player,
+        other_player=other_player,
+        n=n,
+        rng=rng,
+    )
+    winner = batch.run()
+    return (
+        winner == bitboard.COLOR_INDEX[current_player.color],
+        batch.n_moves,
+    )
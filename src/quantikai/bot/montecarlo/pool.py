@@ -0,0 +1,82 @@
+"""Worker processes shared by all the parallel searches of a process.
+
+The pool is started on first use and kept until shutdown_pool is called
+or the interpreter exits. Its workers are started with forkserver (spawn
+where it is not available): they do not inherit the threads and sockets
+of the process that uses them, e.g. a gunicorn worker.
+"""
+
+import atexit
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+START_METHOD = (
+    "forkserver"
+    if "forkserver" in multiprocessing.get_all_start_methods()
+    else "spawn"
+)
+
+_pool: ProcessPoolExecutor | None = None
+_pool_size = 0
+_pool_pid: int | None = None
+
+
+def get_pool(num_process: int) -> ProcessPoolExecutor:
+    """Pool with at least num_process workers, started if needed"""
+    global _pool, _pool_size, _pool_pid
+    if _pool is not None and _pool_pid != os.getpid():
+        # inherited from the parent process by a fork: not ours to use
+        _pool = None
+    if _pool is not None and _pool_size < num_process:
+        shutdown_pool()
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=num_process,
+            mp_context=multiprocessing.get_context(START_METHOD),
+        )
+        _pool_size = num_process
+        _pool_pid = os.getpid()
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None and _pool_pid == os.getpid():
+        _pool.shutdown(wait=True, cancel_futures=True)
+    _pool = None
+
+
+def run_in_pool(function, args_list: list[tuple], retry: bool = True) -> list:
+    """Run function(*args) for each args in parallel, returns the results
+    in the same order. If a worker died, the pool is restarted and the
+    jobs run once more with retry: not for jobs that share state, e.g.
+    a node table the dead worker may have left half-updated.
+    """
+    for last_try in (not retry, True):
+        pool = get_pool(len(args_list))
+        try:
+            futures = [pool.submit(function, *args) for args in args_list]
+            return [future.result() for future in futures]
+        except BrokenProcessPool:
+            shutdown_pool()
+            if last_try:
+                raise
+
+
+def imap_in_pool(function, args_list: list[tuple]):
+    """Run function(*args) for each args in parallel, yield the results
+    as soon as they are ready.
+    """
+    pool = get_pool(len(args_list))
+    try:
+        futures = [pool.submit(function, *args) for args in args_list]
+        for future in as_completed(futures):
+            yield future.result()
+    except BrokenProcessPool:
+        shutdown_pool()
+        raise
+
+
+atexit.register(shutdown_pool)
@@ -4,9 +4,26 @@ from dataclasses import dataclass
 DEFAULT_UCT: float = 1000000
 # higher value to increase exploration, lower for exploitation
 UCT_CST = 2
+# Result of a node once the search has proven it, for the player of its move
+UNPROVEN = 0
+PROVEN_WIN = 1
+PROVEN_LOSS = -1
 
 
-@dataclass
+def compute_uct(
+    score: int,
+    times_visited: int,
+    times_parent_visited: int,
+    uct_cst: float = UCT_CST,
+) -> float:
+    if times_visited == 0:
+        return DEFAULT_UCT
+    return (score / times_visited) + 2 * uct_cst * math.sqrt(
+        2 * math.log(max(times_parent_visited, 1)) / times_visited
+    )
+
+
+@dataclass(slots=True)
 class MonteCarloScore:
     """Compute values for each node
     for the Monte-Carlo UCT algorithm.
@@ -20,19 +37,18 @@ class MonteCarloScore:
     uct: float = (
         DEFAULT_UCT  # UCT value, that represents a trade-off exploration/exploitation
     )
+    proven: int = UNPROVEN  # PROVEN_WIN or PROVEN_LOSS once solved
 
     def compute_score(
         self,
         uct_cst: float = UCT_CST,
     ) -> float:
-        if self.times_visited == 0:
-            self.uct = DEFAULT_UCT
-        else:
-            self.uct = (
-                self.score / self.times_visited
-            ) + 2 * uct_cst * math.sqrt(
-                2 * math.log(self.times_parent_visited) / self.times_visited
-            )
+        self.uct = compute_uct(
+            score=self.score,
+            times_visited=self.times_visited,
+            times_parent_visited=self.times_parent_visited,
+            uct_cst=uct_cst,
+        )
         self.times_parent_visited += 1
         return self.uct
 
@@ -0,0 +1,200 @@
+import pathlib
+import time
+
+from quantikai.bot.montecarlo.game_tree import GameTree
+from quantikai.bot.montecarlo.main import (
+    ITERATIONS,
+    MIN_MAX_NODES,
+    USE_DEPTH,
+    _search,
+)
+from quantikai.bot.montecarlo.node import child_board_code
+from quantikai.bot.montecarlo.node_table import ROOT, NodeTable
+from quantikai.game import Board, Move, Player, bitboard, symmetry
+from quantikai.game.exceptions import InvalidFileException
+from quantikai.game.move import MOVES
+
+IDENTITY = symmetry.Symmetry()
+
+
+def _stabilizer(cells: list[int], player: Player) -> list[symmetry.Symmetry]:
+    """Symmetries that leave the board and the hand of the player to play
+    unchanged, but the identity (see symmetry.stabilizer)
+    """
+    pawn_counts = [0] * len(bitboard.PAWNS)
+    for pawn in player.pawns:
+        pawn_counts[bitboard.PAWN_INDEX[pawn]] += 1
+    stabilizer = (
+        symmetry.Symmetry(
+            geometry=symmetry.GEOMETRY_INDEX[cell_perm],
+            pawns=symmetry.PAWN_PERMUTATION_INDEX[pawn_perm],
+        )
+        for cell_perm, pawn_perm in symmetry.stabilizer(cells, pawn_counts)
+    )
+    return [sym for sym in stabilizer if sym != IDENTITY]
+
+
+class SearchSession:
+    """Monte Carlo search that keeps its tree between the moves of a game.
+
+    Each call to get_best_move starts from the node of the previous tree
+    that matches the new position, so the visits of the moves that were
+    played are not lost, also if the opponent played a move left out as
+    symmetric to another one. If the position cannot be found in the tree
+    (e.g. a new game), the search starts from an empty tree.
+    """
+
+    def __init__(
+        self,
+        iterations: int = ITERATIONS,
+        use_depth: bool = USE_DEPTH,
+        all_possible_moves: bool = False,
+        time_budget: float | None = None,
+        early_stop: bool = False,
+        max_nodes: int | None = None,
+    ):
+        if max_nodes is not None and max_nodes < MIN_MAX_NODES:
+            raise ValueError(f"max_nodes must be at least {MIN_MAX_NODES}.")
+        self.iterations = iterations
+        self.use_depth = use_depth
+        self.all_possible_moves = all_possible_moves
+        # seconds per search, None for no limit
+        self.time_budget = time_budget
+        # stop a search once its best move is known (see get_best_move)
+        self.early_stop = early_stop
+        # nodes of the tree kept between the moves, the least visited are
+        # pruned to stay under it (see NodeTable.prune), None for no limit
+        self.max_nodes = max_nodes
+        # number of iterations of the last search, and the number not run
+        # with early_stop
+        self.iterations_done = 0
+        self.iterations_saved = 0
+        self.reset()
+
+    def reset(self):
+        self._node_table: NodeTable | None = None
+        self._board_code: int | None = None
+        # copies of (player to play, other player) at the root
+        self._players: tuple[Player, Player] | None = None
+
+    def _find_node(
+        self, board_code: int, current_player: Player, other_player: Player
+    ) -> tuple[int, symmetry.Symmetry] | None:
+        """Node of the tree whose position is the board, None if there is
+        no such node or the players do not match.
+
+        A move left out as symmetric to another one (see
+        Board.get_possible_moves) is matched with that one: the tree below
+        is then an image of the position, the symmetry returned maps the
+        moves of the tree to the moves on the board.
+        """
+        if self._node_table is None:
+            return None
+        node_table = self._node_table
+        target = symmetry.unpack(board_code)
+        players = {p.color: p.clone() for p in self._players}
+        to_play = self._players[0].color
+        node = ROOT
+        code = self._board_code
+        frame = IDENTITY
+        while code != board_code:
+            child = self._find_child(node, target, frame)
+            if child is None:
+                # the same position, seen through another symmetry
+                for sym in _stabilizer(
+                    symmetry.unpack(code), players[to_play]
+                ):
+                    image = sym.compose(frame)
+                    child = self._find_child(node, target, image)
+                    if child is not None:
+                        frame = image
+                        break
+                else:
+                    return None
+            node = child
+            move = frame.apply_move(node_table.move(node))
+            code = child_board_code(code, move.code)
+            if move.color != to_play:
+                return None
+            players[move.color].remove(move.pawn)
+            to_play = (
+                current_player.color
+                if move.color == other_player.color
+                else other_player.color
+            )
+        if (
+            to_play != current_player.color
+            or players.get(current_player.color) != current_player
+            or players.get(other_player.color) != other_player
+        ):
+            return None
+        return node, frame
+
+    def _find_child(
+        self, node: int, target: list[int], frame: symmetry.Symmetry
+    ) -> int | None:
+        """Child of the node whose move, through frame, puts the pawn of
+        the target board on its cell.
+        """
+        for child in self._node_table.children(node):
+            move_code = frame.apply_move(self._node_table.move(child)).code
+            if target[move_code >> 3] == 1 + (move_code & 7):
+                return child
+        return None
+
+    def _reroot(
+        self, board: Board, current_player: Player, other_player: Player
+    ):
+        board_code = board.get_code()
+        found = self._find_node(board_code, current_player, other_player)
+        if found is None:
+            self._node_table = NodeTable()
+        else:
+            node, frame = found
+            if node != ROOT:
+                self._node_table = self._node_table.subtree(node)
+            if frame != IDENTITY:
+                # the moves of the tree on the board
+                moves = self._node_table.moves
+                for child in range(ROOT + 1, len(self._node_table)):
+                    moves[child] = frame.apply_move(MOVES[moves[child]]).code
+        self._board_code = board_code
+        self._players = (current_player.clone(), other_player.clone())
+
+    def get_best_move(
+        self,
+        board: Board,
+        current_player: Player,
+        other_player: Player,
+        game_tree_folder: pathlib.Path | None = None,
+    ) -> Move | None:
+        frozen_board = board.get_frozen()
+        try:
+            game_tree = GameTree.from_file(
+                folder_path=game_tree_folder,
+                depth=len(frozen_board),
+                player_color=current_player.color,
+            )
+            return game_tree.get_best_move(frozen_board)
+        except InvalidFileException:
+            pass
+
+        deadline = None
+        if self.time_budget is not None:
+            deadline = time.time() + self.time_budget
+        self._reroot(board, current_player, other_player)
+        self.iterations_done, self.iterations_saved = _search(
+            node_table=self._node_table,
+            board=board,
+            current_player=current_player,
+            other_player=other_player,
+            iterations=self.iterations,
+            use_depth=self.use_depth,
+            all_possible_moves=self.all_possible_moves,
+            deadline=deadline,
+            max_nodes=self.max_nodes,
+            early_stop=self.early_stop,
+        )
+        return self._node_table.to_game_tree(
+            self._board_code, max_depth=0
+        ).get_best_move(frozen_board)
@@ -0,0 +1,190 @@
+"""Monte Carlo search tree where equivalent positions share their children.
+
+Two positions are equivalent if they are the same board reached by
+different sequences of moves, or one is an image of the other by a
+symmetry of the game (see game.symmetry). The first node of a position
+is expanded, the next ones are linked to it.
+
+The moves of shared children are stored in the frame of the node that
+expanded them. While going down the tree, the frame of a node is the
+symmetry that maps the moves of its children to the moves on the board:
+IDENTITY at the root, composed with the link of each node on the way.
+"""
+
+import array
+import functools
+
+from quantikai.bot.montecarlo.game_tree import GameTree
+from quantikai.bot.montecarlo.node import (
+    MOVE_BITS,
+    child_board_code,
+    pack_node,
+)
+from quantikai.bot.montecarlo.node_table import _COLUMNS, ROOT, NodeTable
+from quantikai.game import Board, Player, bitboard
+from quantikai.game.move import MOVES
+from quantikai.game.symmetry import PAWN_PERMUTATIONS, SYMMETRIES
+
+# Index of the identity in SYMMETRIES
+IDENTITY = 0
+
+
+@functools.cache
+def compose(first: int, second: int) -> int:
+    """Index of the symmetry that applies second, then first"""
+    return SYMMETRIES[first].compose(SYMMETRIES[second]).index
+
+
+@functools.cache
+def inverse(frame: int) -> int:
+    return SYMMETRIES[frame].inverse().index
+
+
+def position_key(
+    board: Board, current_player: Player, other_player: Player
+) -> tuple[tuple, int]:
+    """Same key for the equivalent positions, and the index of the
+    symmetry that maps the position to the canonical one.
+
+    The key is the canonical board, the color to play and the pawns
+    left to the players, all of them seen through that symmetry.
+    """
+    code, sym = board.canonical_key()
+    pawns = PAWN_PERMUTATIONS[sym.pawns]
+    hands = sorted(
+        (
+            bitboard.COLOR_INDEX[sym.apply_color(player.color)],
+            pawns[bitboard.PAWN_INDEX[pawn]],
+        )
+        for player in (current_player, other_player)
+        for pawn in player.pawns
+    )
+    to_play = bitboard.COLOR_INDEX[sym.apply_color(current_player.color)]
+    return (code, to_play, tuple(hands)), sym.index
+
+
+class TranspositionNodeTable(NodeTable):
+    """NodeTable where the nodes of equivalent positions share the
+    children of the first one, so their visits and scores.
+
+    links[node] is the symmetry that maps the moves of the shared
+    children to the frame of the node, IDENTITY for the first node
+    of a position.
+    """
+
+    links: array.array
+    _columns = _COLUMNS + (("links", "H"),)
+
+    def __init__(self, capacity: int = 1024):
+        # key of a position -> (first node of the position, symmetry from
+        # the frame of its children to the canonical position)
+        self._positions: dict[tuple, tuple[int, int]] = dict()
+        # number of nodes linked to the first node of their position
+        self.n_transpositions = 0
+        super().__init__(capacity)
+
+    def find_position(
+        self,
+        node: int,
+        board: Board,
+        current_player: Player,
+        other_player: Player,
+        frame: int,
+    ) -> int:
+        """Link the node, not expanded yet, to the first node of its
+        position if there is one. Otherwise the node is the first one:
+        it is expanded by the caller.
+
+        Args:
+            board, current_player, other_player: position of the node
+            frame (int): frame of the node before the link
+
+        Returns:
+            int: frame of the children of the node
+        """
+        key, to_canonical = position_key(board, current_player, other_player)
+        first = self._positions.get(key)
+        if first is None:
+            self._positions[key] = (node, compose(to_canonical, frame))
+            return frame
+        first_node, first_to_canonical = first
+        # moves of the first node -> canonical position -> the board
+        new_frame = compose(inverse(to_canonical), first_to_canonical)
+        self.links[node] = compose(inverse(frame), new_frame)
+        self.n_children[node] = self.n_children[first_node]
+        self.first_child[node] = self.first_child[first_node]
+        self.n_transpositions += 1
+        return new_frame
+
+    def subtree(
+        self,
+        node: int,
+        expanded: set[int] | None = None,
+        capacity: int = 1024,
+    ) -> NodeTable:
+        """Not supported: the children of a node may be shared with nodes
+        outside of the subtree, in another frame.
+        """
+        raise ValueError(
+            "A TranspositionNodeTable cannot be cut: the children of a node"
+            " may be shared with other nodes."
+        )
+
+    def prune(self, max_nodes: int) -> int:
+        """Not supported, see subtree"""
+        raise ValueError(
+            "A TranspositionNodeTable cannot be pruned: the children of a"
+            " node may be shared with other nodes."
+        )
+
+    def to_game_tree(
+        self,
+        board_code: int,
+        max_depth: int | None = None,
+        game_tree: GameTree | None = None,
+    ) -> GameTree:
+        """See NodeTable.to_game_tree, the moves of the shared children
+        are mapped to each board where they are played.
+        """
+        new_tree = game_tree is None
+        if new_tree:
+            game_tree = GameTree()
+        game_tree._add_stats(
+            pack_node(board_code),
+            self.visits[ROOT],
+            0,
+            self.scores[ROOT],
+            self.proven[ROOT],
+        )
+        # (node, code of its board, number of moves since the root,
+        # frame of its children)
+        queue = [(ROOT, board_code, 0, IDENTITY)]
+        # the nodes of the same board share their children: one is enough
+        boards = {board_code}
+        for parent, parent_board, depth, frame in queue:
+            if max_depth is not None and depth > max_depth:
+                continue
+            sym = SYMMETRIES[frame]
+            for node in self.children(parent):
+                move_code = sym.apply_move(MOVES[self.moves[node]]).code
+                game_tree._add_stats(
+                    (parent_board << MOVE_BITS) | move_code,
+                    self.visits[node],
+                    self.visits[parent],
+                    self.scores[node],
+                    self.proven[node],
+                )
+                node_board = child_board_code(parent_board, move_code)
+                if self.is_expanded(node) and node_board not in boards:
+                    boards.add(node_board)
+                    queue.append(
+                        (
+                            node,
+                            node_board,
+                            depth + 1,
+                            compose(frame, self.links[node]),
+                        )
+                    )
+        if new_tree:
+            game_tree.compute_uct()
+        return game_tree
@@ -68,7 +68,9 @@ def timer():
 
 
 @app.command("montecarlo")
-def generate_montecarlo_tree(depth: int = 16):
+def generate_montecarlo_tree(
+    depth: int = 16, rollout: bool = False, max_nodes: int | None = None
+):
     montecarlo_dir = pathlib.Path.cwd() / "montecarlo"
     montecarlo_dir.mkdir(parents=True, exist_ok=True)
     use_depth = True
@@ -84,6 +86,8 @@ def generate_montecarlo_tree(depth: int = 16):
         use_depth=use_depth,
         max_depth=depth,
         num_process=num_process,
+        rollout=rollout,
+        max_nodes=max_nodes,
     )
     bot.montecarlo.generate_tree(
         path=montecarlo_dir,
@@ -95,6 +99,8 @@ def generate_montecarlo_tree(depth: int = 16):
         use_depth=use_depth,
         max_depth=depth,
         num_process=num_process,
+        rollout=rollout,
+        max_nodes=max_nodes,
     )
     bot.montecarlo.generate_tree(
         path=montecarlo_dir,
@@ -106,6 +112,8 @@ def generate_montecarlo_tree(depth: int = 16):
         use_depth=use_depth,
         max_depth=depth,
         num_process=num_process,
+        rollout=rollout,
+        max_nodes=max_nodes,
     )
     bot.montecarlo.generate_tree(
         path=montecarlo_dir,
@@ -117,6 +125,8 @@ def generate_montecarlo_tree(depth: int = 16):
         use_depth=use_depth,
         max_depth=depth,
         num_process=num_process,
+        rollout=rollout,
+        max_nodes=max_nodes,
     )
 
 
@@ -0,0 +1,75 @@
+"""Bitboard helpers: the 16 cells of the board are the 16 bits of an int,
+cell (x, y) being the bit number x * 4 + y.
+"""
+
+from quantikai.game.enums import Colors, Pawns
+
+SIZE = 4
+N_CELLS = SIZE * SIZE
+FULL_MASK = (1 << N_CELLS) - 1
+
+PAWNS = tuple(Pawns)
+COLORS = tuple(Colors)
+PAWN_INDEX = {pawn: idx for idx, pawn in enumerate(PAWNS)}
+COLOR_INDEX = {color: idx for idx, color in enumerate(COLORS)}
+
+ROW_MASKS = tuple(
+    sum(1 << (x * SIZE + y) for y in range(SIZE)) for x in range(SIZE)
+)
+COLUMN_MASKS = tuple(
+    sum(1 << (x * SIZE + y) for x in range(SIZE)) for y in range(SIZE)
+)
+SECTION_MASKS = tuple(
+    sum(
+        1 << (x * SIZE + y)
+        for x in range(sx, sx + 2)
+        for y in range(sy, sy + 2)
+    )
+    for sx in (0, 2)
+    for sy in (0, 2)
+)
+
+
+def cell_index(x: int, y: int) -> int:
+    return x * SIZE + y
+
+
+def section_index(x: int, y: int) -> int:
+    return 2 * (x // 2) + y // 2
+
+
+def mask_index(pawn_idx: int, color_idx: int) -> int:
+    """Index of the (pawn, color) mask in a list of 8 masks."""
+    return (pawn_idx << 1) | color_idx
+
+
+def iter_bits(mask: int):
+    """Yield the index of each bit set in the mask, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+# For each cell: the masks of its row, column and section
+CELL_LINES = tuple(
+    (
+        ROW_MASKS[x],
+        COLUMN_MASKS[y],
+        SECTION_MASKS[section_index(x, y)],
+    )
+    for x in range(SIZE)
+    for y in range(SIZE)
+)
+# For each cell: all the cells that share a row, column or section with it
+CELL_ZONES = tuple(row | col | sec for row, col, sec in CELL_LINES)
+
+# The 12 lines where 4 different pawns win: rows, columns then sections
+LINE_MASKS = ROW_MASKS + COLUMN_MASKS + SECTION_MASKS
+CELL_LINE_INDEXES = tuple(
+    (x, SIZE + y, 2 * SIZE + section_index(x, y))
+    for x in range(SIZE)
+    for y in range(SIZE)
+)
+# Mask of the pawn types in a line when the 4 of them are there
+ALL_PAWNS = (1 << len(PAWNS)) - 1
@@ -1,9 +1,25 @@
+import functools
 from dataclasses import dataclass
-from typing import Generator
 
+from quantikai.game import bitboard, symmetry
 from quantikai.game.enums import Colors, Pawns
 from quantikai.game.exceptions import InvalidMoveError
-from quantikai.game.move import Move
+from quantikai.game.move import MOVES, Move
+
+
+def _get_cells(items) -> list[int]:
+    """Board as a list of cell values, see the symmetry module"""
+    cells = [0] * bitboard.N_CELLS
+    for x, y, pawn, color in items:
+        cells[bitboard.cell_index(x, y)] = 1 + bitboard.mask_index(
+            bitboard.PAWN_INDEX[pawn], bitboard.COLOR_INDEX[color]
+        )
+    return cells
+
+
+def _code_shift(cell: int) -> int:
+    # see symmetry.pack: the first cell is in the highest bits
+    return 4 * (bitboard.N_CELLS - 1 - cell)
 
 
 @dataclass(frozen=True, eq=True)
@@ -20,9 +36,37 @@ class FrozenBoard:
     def to_json(self):
         return list(self.board)
 
+    def canonical_key(self, swap_colors: bool = True):
+        """Same key for all the equivalent boards, see
+        symmetry.canonical_key
+        """
+        return symmetry.canonical_key(
+            _get_cells(self.board),
+            swap_colors=swap_colors,
+        )
+
     def to_compressed(self):
         return list(self.board)
 
+    @functools.cached_property
+    def code(self) -> int:
+        """The board packed in a 64-bit int, 4 bits per cell"""
+        return symmetry.pack(_get_cells(self.board))
+
+    @classmethod
+    def from_code(cls, code: int) -> "FrozenBoard":
+        return cls(
+            frozenset(
+                (
+                    *divmod(cell, bitboard.SIZE),
+                    bitboard.PAWNS[(value - 1) >> 1],
+                    bitboard.COLORS[(value - 1) & 1],
+                )
+                for cell, value in enumerate(symmetry.unpack(code))
+                if value
+            )
+        )
+
     @classmethod
     def from_compressed(cls, body):
         return cls(
@@ -42,6 +86,14 @@ class FrozenBoard:
 
 class Board:
     _board: dict[tuple[int, int], tuple[Pawns, Colors]]
+    # one 16-bit mask per (pawn, color), see bitboard.mask_index
+    _masks: list[int]
+    _forbidden: list[int]
+    _occupied: int
+    _line_pawns: list[int]
+    _line_counts: list[int]
+    # same as FrozenBoard.code, kept up to date by play and undo
+    _code: int
     _size: int = 4
 
     def __init__(
@@ -60,6 +112,7 @@ class Board:
                 raise
         else:
             self._board = dict()
+        self._init_masks()
 
     def __len__(self):
         return len(self._board)
@@ -95,7 +148,82 @@ class Board:
         if strict:
             self._check_move_is_valid(move)
         self._board[(move.x, move.y)] = (move.pawn, move.color)
-        return self._move_is_a_win(move.x, move.y)
+        cell = bitboard.cell_index(move.x, move.y)
+        self._add_pawn(
+            cell,
+            bitboard.PAWN_INDEX[move.pawn],
+            bitboard.COLOR_INDEX[move.color],
+        )
+        return self._is_a_win(cell)
+
+    def undo(self, move: Move):
+        """Take back a move done with `play`, so that a search can walk
+        down and back up the game with a single board.
+        """
+        del self._board[(move.x, move.y)]
+        pawn_idx = bitboard.PAWN_INDEX[move.pawn]
+        color_idx = bitboard.COLOR_INDEX[move.color]
+        cell = bitboard.cell_index(move.x, move.y)
+        bit = 1 << cell
+        self._masks[bitboard.mask_index(pawn_idx, color_idx)] &= ~bit
+        self._occupied &= ~bit
+        self._code &= ~(0xF << _code_shift(cell))
+        # the zones of the pawns left on the board may overlap the zone
+        # of the removed one: rebuild the opponent's forbidden cells
+        forbidden = 0
+        for other_cell in bitboard.iter_bits(
+            self._masks[bitboard.mask_index(pawn_idx, color_idx)]
+        ):
+            forbidden |= bitboard.CELL_ZONES[other_cell]
+        self._forbidden[bitboard.mask_index(pawn_idx, 1 - color_idx)] = (
+            forbidden
+        )
+        pawn_mask = self._masks[2 * pawn_idx] | self._masks[2 * pawn_idx + 1]
+        for line in bitboard.CELL_LINE_INDEXES[cell]:
+            self._line_counts[line] -= 1
+            if not pawn_mask & bitboard.LINE_MASKS[line]:
+                self._line_pawns[line] &= ~(1 << pawn_idx)
+
+    def get_winning_moves(
+        self, pawns: list[Pawns], color: Colors
+    ) -> list[Move]:
+        """Moves that complete a row, column or section with 4 different
+        pawns: lines with 3 different pawns are read from the line counters.
+        """
+        color_idx = bitboard.COLOR_INDEX[color]
+        pawn_indexes = {bitboard.PAWN_INDEX[p] for p in pawns}
+        moves = list()
+        for line, line_pawns in enumerate(self._line_pawns):
+            if self._line_counts[line] != 3 or line_pawns.bit_count() != 3:
+                continue
+            pawn_idx = (bitboard.ALL_PAWNS ^ line_pawns).bit_length() - 1
+            if pawn_idx not in pawn_indexes:
+                continue
+            cells = bitboard.LINE_MASKS[line] & self._legal_cells(
+                pawn_idx, color_idx
+            )
+            if cells:
+                moves.append(
+                    MOVES[
+                        ((cells.bit_length() - 1) << 3)
+                        | bitboard.mask_index(pawn_idx, color_idx)
+                    ]
+                )
+        return moves
+
+    def have_winning_move(self, pawns: list[Pawns], color: Colors) -> bool:
+        return len(self.get_winning_moves(pawns, color)) > 0
+
+    def copy(self) -> "Board":
+        board = Board.__new__(Board)
+        board._board = dict(self._board)
+        board._masks = list(self._masks)
+        board._forbidden = list(self._forbidden)
+        board._occupied = self._occupied
+        board._code = self._code
+        board._line_pawns = list(self._line_pawns)
+        board._line_counts = list(self._line_counts)
+        return board
 
     def print(self):
         upper_idx = "  "
@@ -123,15 +251,11 @@ class Board:
         print(str_board)
 
     def have_possible_move(self, color: Colors):
-        for x in range(self._size):
-            for y in range(self._size):
-                for pawn in Pawns:
-                    try:
-                        self._check_move_is_valid(Move(x, y, pawn, color))
-                        return True
-                    except InvalidMoveError:
-                        pass
-        return False
+        color_idx = bitboard.COLOR_INDEX[color]
+        return any(
+            self._legal_cells(pawn_idx, color_idx)
+            for pawn_idx in range(len(bitboard.PAWNS))
+        )
 
     def get_possible_moves(
         self, pawns: list[Pawns], color: Colors, optimize=False
@@ -146,45 +270,57 @@ class Board:
         Returns:
             set[Move]: _description_
         """
-        moves = set()
-        conditions = list()
-        if optimize:
-            # playable pawns are those already on board + one unknown
-            pawns_on_board = {p for p, _ in self._board.values() if p in pawns}
-            extra_pawns = set(pawns) - pawns_on_board
-            pawns = list(pawns_on_board)
-            if len(extra_pawns) > 0:
-                pawns.append(list(extra_pawns)[0])
-            if self._horizontal_symmetry() == self._board:
-                conditions.append(lambda x, y: x <= 1)
-            if self._vertical_symmetry() == self._board:
-                conditions.append(lambda x, y: y <= 1)
-            if self._diag_left_symmetry() == self._board:
-                conditions.append(lambda x, y: x <= y)
-            if self._diag_right_symmetry() == self._board:
-                conditions.append(lambda x, y: x + y <= 3)
-
-        moves: set = {
-            (i, j, p, color)
-            for i in range(self._size)
-            for j in range(self._size)
-            for p in pawns
-        }
-        for (bx, by), (bpawn, bcolor) in self._board.items():
-            for pawn in pawns:
-                moves.discard((bx, by, pawn, color))
-            if bcolor != color:
-                for idx in range(self._size):
-                    moves.discard((idx, by, bpawn, color))
-                    moves.discard((bx, idx, bpawn, color))
-                for i, j in self._get_section_elements(bx, by):
-                    moves.discard((i, j, bpawn, color))
-            # Optimization: 30% speed-up using tuples instead of Move in the previous step
-        for item in moves:
-            if all([c(item[0], item[1]) for c in conditions]):
-                yield Move(*item)
-            else:
-                continue
+        pawn_indexes = {bitboard.PAWN_INDEX[p] for p in pawns}
+        color_idx = bitboard.COLOR_INDEX[color]
+        # read the masks now: the board may change while the moves are used
+        legal_cells = [
+            (p, self._legal_cells(p, color_idx)) for p in sorted(pawn_indexes)
+        ]
+        if not optimize:
+            for pawn_idx, cells in legal_cells:
+                move_idx = bitboard.mask_index(pawn_idx, color_idx)
+                for cell in bitboard.iter_bits(cells):
+                    yield MOVES[(cell << 3) | move_idx]
+            return
+
+        # Keep one move per orbit under the symmetries that leave the
+        # board and the player's pawns unchanged: going through the moves
+        # in increasing (cell, pawn) order, the first move of an orbit is
+        # kept and its images are skipped.
+        pawn_counts = [0] * len(bitboard.PAWNS)
+        for pawn in pawns:
+            pawn_counts[bitboard.PAWN_INDEX[pawn]] += 1
+        stabilizer = symmetry.stabilizer(
+            _get_cells((x, y, p, c) for (x, y), (p, c) in self._board.items()),
+            pawn_counts,
+        )
+        seen: set[int] = set()
+        for cell in range(bitboard.N_CELLS):
+            for pawn_idx, cells in legal_cells:
+                code = (cell << 3) | bitboard.mask_index(pawn_idx, color_idx)
+                if not cells >> cell & 1 or code in seen:
+                    continue
+                for cell_perm, pawn_perm in stabilizer:
+                    seen.add(
+                        (cell_perm[cell] << 3)
+                        | bitboard.mask_index(pawn_perm[pawn_idx], color_idx)
+                    )
+                yield MOVES[code]
+
+    def canonical_key(
+        self, swap_colors: bool = True
+    ) -> tuple[int, symmetry.Symmetry]:
+        """Compact code shared by all the boards equivalent to this one,
+        and the symmetry that maps this board to the canonical one.
+        """
+        return symmetry.canonical_key(
+            _get_cells((x, y, p, c) for (x, y), (p, c) in self._board.items()),
+            swap_colors=swap_colors,
+        )
+
+    def get_code(self) -> int:
+        """Same as get_frozen().code, without building the frozen board"""
+        return self._code
 
     def get_frozen(self) -> FrozenBoard:
         return FrozenBoard(
@@ -204,40 +340,37 @@ class Board:
                 + " "
                 + str(move.y)
             )
-        if (move.x, move.y) in self._board:
+        if self._occupied >> bitboard.cell_index(move.x, move.y) & 1:
             raise InvalidMoveError("already a pawn there")
-        for j in range(self._size):
-            if (
-                (move.x, j) in self._board
-                and self._board[(move.x, j)][0] == move.pawn
-                and self._board[(move.x, j)][1] != move.color
-            ):
-                raise InvalidMoveError(
-                    "there is an opponent's pawn in that row"
-                )
-        for i in range(self._size):
-            if (
-                (i, move.y) in self._board
-                and self._board[(i, move.y)][0] == move.pawn
-                and self._board[(i, move.y)][1] != move.color
-            ):
-                raise InvalidMoveError(
-                    "there is an opponent's pawn in that column"
-                )
-        # check section
-        for i, j in self._get_section_elements(move.x, move.y):
-            if (
-                (i, j) in self._board
-                and self._board[(i, j)][0] == move.pawn
-                and self._board[(i, j)][1] != move.color
-            ):
-                raise InvalidMoveError(
-                    "there is an opponent's pawn in that section"
-                )
+        opponent_mask = self._masks[
+            bitboard.mask_index(
+                bitboard.PAWN_INDEX[move.pawn],
+                1 - bitboard.COLOR_INDEX[move.color],
+            )
+        ]
+        if opponent_mask & bitboard.ROW_MASKS[move.x]:
+            raise InvalidMoveError("there is an opponent's pawn in that row")
+        if opponent_mask & bitboard.COLUMN_MASKS[move.y]:
+            raise InvalidMoveError(
+                "there is an opponent's pawn in that column"
+            )
+        if (
+            opponent_mask
+            & bitboard.SECTION_MASKS[bitboard.section_index(move.x, move.y)]
+        ):
+            raise InvalidMoveError(
+                "there is an opponent's pawn in that section"
+            )
 
     def _move_is_a_win(self, x: int, y: int):
-        return (
-            self._row_win(x) or self._column_win(y) or self._section_win(x, y)
+        return self._is_a_win(bitboard.cell_index(x, y))
+
+    def _is_a_win(self, cell: int):
+        # a full line is a win if each pawn type is there once
+        return any(
+            self._line_counts[line] == bitboard.SIZE
+            and self._line_pawns[line] == bitboard.ALL_PAWNS
+            for line in bitboard.CELL_LINE_INDEXES[cell]
         )
 
     def _ctxt(self, txt: str, color: Colors | None = None) -> str:
@@ -246,54 +379,41 @@ class Board:
         if color == "RED":
             return "\033[41m" + txt + "\033[0m"
 
-    def _row_win(self, x: int):
-        other_pawns: set[Pawns] = set()
-        for j in range(self._size):
-            if (
-                not (x, j) in self._board
-                or self._board[(x, j)][0] in other_pawns
-            ):
-                return False
-            other_pawns.add(self._board[(x, j)][0])
-        return True
-
-    def _column_win(self, y: int):
-        other_pawns: set[Pawns] = set()
-        for i in range(self._size):
-            if (
-                not (i, y) in self._board
-                or self._board[(i, y)][0] in other_pawns
-            ):
-                return False
-            other_pawns.add(self._board[(i, y)][0])
-        return True
-
-    def _section_win(self, x: int, y: int):
-        others: set[Pawns] = set()
-        for i, j in self._get_section_elements(x, y):
-            if not (i, j) in self._board or self._board[(i, j)][0] in others:
-                return False
-            others.add(self._board[(i, j)][0])
-        return True
-
-    def _get_section_elements(
-        self, x: int, y: int
-    ) -> Generator[tuple[int, int], None, None]:
-
-        yield from (
-            (i, j)
-            for i in range(2 * (x // 2), 2 * (x // 2 + 1))
-            for j in range(2 * (y // 2), 2 * (y // 2 + 1))
+    def _legal_cells(self, pawn_idx: int, color_idx: int) -> int:
+        """Mask of the cells where color can play pawn."""
+        return bitboard.FULL_MASK & ~(
+            self._occupied
+            | self._forbidden[bitboard.mask_index(pawn_idx, color_idx)]
         )
 
-    def _horizontal_symmetry(self) -> dict:
-        return {(3 - x, y): pc for ((x, y), pc) in self._board.items()}
-
-    def _vertical_symmetry(self) -> dict:
-        return {(x, 3 - y): pc for ((x, y), pc) in self._board.items()}
-
-    def _diag_left_symmetry(self) -> dict:
-        return {(y, x): pc for ((x, y), pc) in self._board.items()}
-
-    def _diag_right_symmetry(self) -> dict:
-        return {(3 - y, 3 - x): pc for ((x, y), pc) in self._board.items()}
+    def _add_pawn(self, cell: int, pawn_idx: int, color_idx: int):
+        bit = 1 << cell
+        self._masks[bitboard.mask_index(pawn_idx, color_idx)] |= bit
+        self._occupied |= bit
+        self._code |= (
+            1 + bitboard.mask_index(pawn_idx, color_idx)
+        ) << _code_shift(cell)
+        # the opponent cannot play this pawn in the row, column
+        # and section of the cell any more
+        self._forbidden[
+            bitboard.mask_index(pawn_idx, 1 - color_idx)
+        ] |= bitboard.CELL_ZONES[cell]
+        for line in bitboard.CELL_LINE_INDEXES[cell]:
+            self._line_counts[line] += 1
+            self._line_pawns[line] |= 1 << pawn_idx
+
+    def _init_masks(self):
+        self._masks = [0] * (2 * len(bitboard.PAWNS))
+        # per (pawn, color): cells forbidden by an opponent's pawn
+        self._forbidden = [0] * (2 * len(bitboard.PAWNS))
+        self._occupied = 0
+        self._code = 0
+        # per row, column and section: pawn types there and number of pawns
+        self._line_pawns = [0] * len(bitboard.LINE_MASKS)
+        self._line_counts = [0] * len(bitboard.LINE_MASKS)
+        for (x, y), (pawn, color) in self._board.items():
+            self._add_pawn(
+                bitboard.cell_index(x, y),
+                bitboard.PAWN_INDEX[pawn],
+                bitboard.COLOR_INDEX[color],
+            )
@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 
+from quantikai.game import bitboard
 from quantikai.game.enums import Colors, Pawns
 
 
@@ -18,6 +19,23 @@ class Move:
             "color": self.color.name,
         }
 
+    @property
+    def code(self) -> int:
+        """Small integer encoding of the move, between 0 and 127:
+        cell index, then bitboard.mask_index(pawn, color) on 3 bits.
+        """
+        return (bitboard.cell_index(self.x, self.y) << 3) | (
+            bitboard.mask_index(
+                bitboard.PAWN_INDEX[self.pawn],
+                bitboard.COLOR_INDEX[self.color],
+            )
+        )
+
+    @classmethod
+    def from_code(cls, code: int) -> "Move":
+        """Shared instance of the move, see MOVES"""
+        return MOVES[code]
+
     def to_compressed(self):
         return [self.x, self.y, self.pawn.name, self.color.name]
 
@@ -28,3 +46,15 @@ class Move:
         return cls(
             x=body[0], y=body[1], pawn=Pawns[body[2]], color=Colors[body[3]]
         )
+
+
+# There are only 16 * 4 * 2 moves: one shared instance of each, by code
+MOVES = tuple(
+    Move(
+        x=(code >> 3) // bitboard.SIZE,
+        y=(code >> 3) % bitboard.SIZE,
+        pawn=bitboard.PAWNS[(code & 7) >> 1],
+        color=bitboard.COLORS[code & 1],
+    )
+    for code in range(bitboard.N_CELLS << 3)
+)
@@ -1,22 +1,59 @@
-from dataclasses import dataclass, field
-
+from quantikai.game import bitboard
 from quantikai.game.enums import Colors, Pawns
 from quantikai.game.exceptions import InvalidMoveError
 
 
-@dataclass
 class Player:
+    """A color and the pawns left to play, stored as one counter
+    per pawn type so that searches can carry players around cheaply.
+    """
+
+    __slots__ = ("color", "_counts")
+
     color: Colors
-    pawns: list[Pawns] = field(
-        default_factory=lambda: 2 * [pawn for pawn in Pawns]
-    )
+    _counts: list[int]
+
+    def __init__(self, color: Colors, pawns: list[Pawns] | None = None):
+        self.color = color
+        if pawns is None:
+            self._counts = [2] * len(bitboard.PAWNS)
+        else:
+            self._counts = [0] * len(bitboard.PAWNS)
+            for pawn in pawns:
+                self._counts[bitboard.PAWN_INDEX[pawn]] += 1
+
+    @property
+    def pawns(self) -> list[Pawns]:
+        return [
+            pawn
+            for pawn, count in zip(bitboard.PAWNS, self._counts)
+            for _ in range(count)
+        ]
+
+    def __eq__(self, other):
+        if not isinstance(other, Player):
+            return NotImplemented
+        return self.color == other.color and self._counts == other._counts
+
+    def __repr__(self):
+        return f"Player(color={self.color!r}, pawns={self.pawns!r})"
+
+    def clone(self) -> "Player":
+        player = Player.__new__(Player)
+        player.color = self.color
+        player._counts = list(self._counts)
+        return player
 
     def remove(self, pawn: Pawns):
         self.check_has_pawn(pawn)
-        self.pawns.remove(pawn)
+        self._counts[bitboard.PAWN_INDEX[pawn]] -= 1
+
+    def add(self, pawn: Pawns):
+        """Give back a pawn, counterpart of `remove`"""
+        self._counts[bitboard.PAWN_INDEX[pawn]] += 1
 
     def check_has_pawn(self, pawn):
-        if pawn not in self.pawns:
+        if not self._counts[bitboard.PAWN_INDEX[pawn]]:
             raise InvalidMoveError("You do not have this pawn.")
 
     def get_printable_list_pawns(self):
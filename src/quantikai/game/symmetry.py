@@ -0,0 +1,248 @@
+"""Symmetries of the game: a position is equivalent to any other one
+obtained by moving the cells with one of the 8 symmetries of the square
+(they keep the rows, columns and sections), relabeling the pawns
+A to D and swapping the colors.
+
+Boards are handled as a list of 16 cell values: 0 for an empty cell,
+1 + bitboard.mask_index(pawn, color) otherwise.
+"""
+
+import itertools
+from dataclasses import dataclass
+
+from quantikai.game import bitboard
+from quantikai.game.enums import Colors
+from quantikai.game.move import MOVES, Move
+
+
+def _geometry_table(transform) -> tuple[int, ...]:
+    return tuple(
+        bitboard.cell_index(*transform(x, y))
+        for x in range(bitboard.SIZE)
+        for y in range(bitboard.SIZE)
+    )
+
+
+_LAST = bitboard.SIZE - 1
+# CELL_PERMUTATIONS[g][cell] is the cell where g moves cell
+CELL_PERMUTATIONS = tuple(
+    _geometry_table(transform)
+    for transform in (
+        lambda x, y: (x, y),
+        lambda x, y: (y, _LAST - x),  # rotations
+        lambda x, y: (_LAST - x, _LAST - y),
+        lambda x, y: (_LAST - y, x),
+        lambda x, y: (_LAST - x, y),  # reflections
+        lambda x, y: (x, _LAST - y),
+        lambda x, y: (y, x),
+        lambda x, y: (_LAST - y, _LAST - x),
+    )
+)
+GEOMETRY_INDEX = {perm: idx for idx, perm in enumerate(CELL_PERMUTATIONS)}
+INVERSE_GEOMETRY = tuple(
+    next(
+        h
+        for h, inverse in enumerate(CELL_PERMUTATIONS)
+        if all(inverse[perm[cell]] == cell for cell in range(bitboard.N_CELLS))
+    )
+    for perm in CELL_PERMUTATIONS
+)
+# PAWN_PERMUTATIONS[p][pawn_idx] is the new index of the pawn
+PAWN_PERMUTATIONS = tuple(itertools.permutations(range(len(bitboard.PAWNS))))
+PAWN_PERMUTATION_INDEX = {
+    perm: idx for idx, perm in enumerate(PAWN_PERMUTATIONS)
+}
+INVERSE_PAWNS = tuple(
+    PAWN_PERMUTATION_INDEX[
+        tuple(perm.index(pawn_idx) for pawn_idx in range(len(perm)))
+    ]
+    for perm in PAWN_PERMUTATIONS
+)
+
+
+@dataclass(frozen=True)
+class Symmetry:
+    """A transform of the board: geometry and pawns are indexes in
+    CELL_PERMUTATIONS and PAWN_PERMUTATIONS.
+    """
+
+    geometry: int = 0
+    pawns: int = 0
+    swap_colors: bool = False
+
+    def inverse(self) -> "Symmetry":
+        return Symmetry(
+            geometry=INVERSE_GEOMETRY[self.geometry],
+            pawns=INVERSE_PAWNS[self.pawns],
+            swap_colors=self.swap_colors,
+        )
+
+    def apply_color(self, color: Colors) -> Colors:
+        if not self.swap_colors:
+            return color
+        return bitboard.COLORS[1 - bitboard.COLOR_INDEX[color]]
+
+    def apply_move(self, move: Move) -> Move:
+        code = move.code
+        cell = CELL_PERMUTATIONS[self.geometry][code >> 3]
+        pawn_idx = PAWN_PERMUTATIONS[self.pawns][(code & 7) >> 1]
+        color_idx = (code & 1) ^ self.swap_colors
+        return MOVES[(cell << 3) | bitboard.mask_index(pawn_idx, color_idx)]
+
+    def revert_move(self, move: Move) -> Move:
+        """Map a move on the transformed board back to the original one."""
+        return self.inverse().apply_move(move)
+
+    def compose(self, other: "Symmetry") -> "Symmetry":
+        """Transform that applies other, then self"""
+        geometry = CELL_PERMUTATIONS[self.geometry]
+        pawns = PAWN_PERMUTATIONS[self.pawns]
+        return Symmetry(
+            geometry=GEOMETRY_INDEX[
+                tuple(
+                    geometry[cell]
+                    for cell in CELL_PERMUTATIONS[other.geometry]
+                )
+            ],
+            pawns=PAWN_PERMUTATION_INDEX[
+                tuple(pawns[p] for p in PAWN_PERMUTATIONS[other.pawns])
+            ],
+            swap_colors=self.swap_colors != other.swap_colors,
+        )
+
+    @property
+    def index(self) -> int:
+        """Position in SYMMETRIES"""
+        return (
+            self.geometry * len(PAWN_PERMUTATIONS) + self.pawns
+        ) * 2 + self.swap_colors
+
+    def apply_cells(self, cells: list[int]) -> list[int]:
+        geometry = CELL_PERMUTATIONS[self.geometry]
+        pawns = PAWN_PERMUTATIONS[self.pawns]
+        new_cells = [0] * bitboard.N_CELLS
+        for cell, value in enumerate(cells):
+            if value:
+                new_cells[geometry[cell]] = 1 + bitboard.mask_index(
+                    pawns[(value - 1) >> 1],
+                    ((value - 1) & 1) ^ self.swap_colors,
+                )
+        return new_cells
+
+
+SYMMETRIES = tuple(
+    Symmetry(geometry=geometry, pawns=pawns, swap_colors=swap_colors)
+    for geometry in range(len(CELL_PERMUTATIONS))
+    for pawns in range(len(PAWN_PERMUTATIONS))
+    for swap_colors in (False, True)
+)
+
+
+def stabilizer(
+    cells: list[int], pawn_counts: list[int]
+) -> list[tuple[tuple[int, ...], tuple[int, ...]]]:
+    """(cell permutation, pawn permutation) pairs, colors unchanged,
+    that leave the board as it is. The pawn permutations also keep the
+    number of pawns of each type in pawn_counts (the player's hand).
+    """
+    n_pawns = len(bitboard.PAWNS)
+    result = list()
+    for geometry in CELL_PERMUTATIONS:
+        mapping: dict[int, int] = dict()
+        for cell, value in enumerate(cells):
+            image = cells[geometry[cell]]
+            if not value and not image:
+                continue
+            if not value or not image or (value - image) & 1:
+                # empty and occupied cells or colors do not match
+                break
+            if mapping.setdefault((value - 1) >> 1, (image - 1) >> 1) != (
+                (image - 1) >> 1
+            ):
+                break
+        else:
+            # the pawns on the board are mapped to pawns on the board,
+            # the others can be relabeled among themselves
+            result.extend(
+                (geometry, pawns)
+                for pawns in PAWN_PERMUTATIONS
+                if all(pawns[p] == q for p, q in mapping.items())
+                and all(
+                    pawn_counts[pawns[p]] == pawn_counts[p]
+                    for p in range(n_pawns)
+                )
+            )
+    return result
+
+
+def pack(cells: list[int]) -> int:
+    """4 bits per cell, the first cell in the highest bits."""
+    code = 0
+    for value in cells:
+        code = (code << 4) | value
+    return code
+
+
+def unpack(code: int) -> list[int]:
+    """Counterpart of pack"""
+    return [
+        (code >> (4 * (bitboard.N_CELLS - 1 - cell))) & 0xF
+        for cell in range(bitboard.N_CELLS)
+    ]
+
+
+def canonical_key(
+    cells: list[int], swap_colors: bool = True
+) -> tuple[int, Symmetry]:
+    """Smallest packed code among all the boards equivalent to cells,
+    and the symmetry that transforms cells into it.
+
+    For a geometry and a color swap, the smallest code is obtained by
+    naming the pawns in their order of appearance, so only
+    8 * 2 candidates are built instead of 8 * 24 * 2.
+    With swap_colors, use Symmetry.apply_color to know which color
+    is to play in the canonical position.
+    """
+    best = None
+    for geometry in range(len(CELL_PERMUTATIONS)):
+        # the cell of the original board that goes to each position
+        origin = CELL_PERMUTATIONS[INVERSE_GEOMETRY[geometry]]
+        for swap in (0, 1) if swap_colors else (0,):
+            relabel: dict[int, int] = dict()
+            code = 0
+            # whether the first cells already make it smaller than the best
+            smaller = best is None
+            for position in range(bitboard.N_CELLS):
+                value = cells[origin[position]]
+                if value:
+                    pawn_idx = (value - 1) >> 1
+                    if pawn_idx not in relabel:
+                        relabel[pawn_idx] = len(relabel)
+                    value = 1 + bitboard.mask_index(
+                        relabel[pawn_idx], ((value - 1) & 1) ^ swap
+                    )
+                code = (code << 4) | value
+                if not smaller:
+                    # same first cells of the best code
+                    best_prefix = best[0] >> (
+                        4 * (bitboard.N_CELLS - 1 - position)
+                    )
+                    if code > best_prefix:
+                        break
+                    smaller = code < best_prefix
+            else:
+                if smaller:
+                    best = (code, geometry, swap, relabel)
+
+    code, geometry, swap, relabel = best
+    # pawns that are not on the board take the labels left, in order
+    for pawn_idx in range(len(bitboard.PAWNS)):
+        if pawn_idx not in relabel:
+            relabel[pawn_idx] = len(relabel)
+    return code, Symmetry(
+        geometry=geometry,
+        pawns=PAWN_PERMUTATION_INDEX[
+            tuple(relabel[p] for p in range(len(bitboard.PAWNS)))
+        ],
+        swap_colors=bool(swap),
+    )
@@ -101,6 +101,7 @@ def bot_play():
     """Play against a bot"""
     board, player_cycle = init_game()
     player = next(player_cycle)
+    session = bot.montecarlo.SearchSession()
 
     print("Welcome to the Quantik game!")
     print("Example of a valid first move: 0 0 A\n")
@@ -129,7 +130,9 @@ def bot_play():
                 other_player = next(player_cycle)
                 next(player_cycle)  # Compensate
 
-                move = bot.get_best_move(board, player, other_player)
+                move = bot.get_best_move(
+                    board, player, other_player, session=session
+                )
                 if move is None:
                     print(
                         "Player " + player.color.name + " gives up and loses."
@@ -1,4 +1,7 @@
+import collections
+import os
 import pathlib
+import uuid
 
 from flask import Flask, jsonify, render_template, request, session
 
@@ -8,6 +11,20 @@ from quantikai.bot import montecarlo
 PLAYER_WIN_MSG = "Congratulations, you win!"
 BOT_WIN_MSG = "The bot wins!"
 MONTECARLO_FILE = pathlib.Path.cwd() / "montecarlo"
+# Number of games whose bot search tree is kept in memory, and nodes of
+# each tree: 35 bytes a node (montecarlo.node_table.NODE_SIZE) in a table
+# that grows by doubling, about 9 MB per game, twice that while pruned
+MAX_SEARCH_SESSIONS = 8
+SEARCH_SESSION_MAX_NODES = 200_000
+# With more than one process, the bot runs root-parallel searches in a
+# pool of worker processes instead of keeping its tree between moves
+NUM_PROCESS = int(os.environ.get("QUANTIKAI_NUM_PROCESS", 1))
+# Maximum duration of a bot search in seconds, no limit if not set
+TIME_BUDGET = (
+    float(os.environ["QUANTIKAI_TIME_BUDGET"])
+    if "QUANTIKAI_TIME_BUDGET" in os.environ
+    else None
+)
 
 
 def create_app():
@@ -18,6 +35,30 @@ def create_app():
     )
     app.secret_key = b'_5#y2L"F4Q8z\n\xec]/'
 
+    # The Flask session is a cookie: the search trees stay in the process,
+    # the least recently used ones are dropped
+    search_sessions: collections.OrderedDict[str, montecarlo.SearchSession] = (
+        collections.OrderedDict()
+    )
+
+    def get_search_session() -> montecarlo.SearchSession | None:
+        game_id = session.get("game_id")
+        if game_id is None:
+            return None
+        search_session = search_sessions.pop(game_id, None)
+        if search_session is None:
+            search_session = montecarlo.SearchSession(
+                time_budget=TIME_BUDGET, max_nodes=SEARCH_SESSION_MAX_NODES
+            )
+        search_sessions[game_id] = search_session
+        while len(search_sessions) > MAX_SEARCH_SESSIONS:
+            search_sessions.popitem(last=False)
+        return search_session
+
+    def drop_search_session():
+        """The game is over: its tree is not needed anymore"""
+        search_sessions.pop(session.get("game_id"), None)
+
     @app.errorhandler(game.InvalidMoveError)
     def exception_handler(error):
         return jsonify(error=400, text=str(error)), 400
@@ -30,6 +71,8 @@ def create_app():
         session["human_player"] = human_player.to_json()
         session["bot_player"] = game.Player(color=game.Colors.RED).to_json()
         session["next_player"] = "human_player"
+        drop_search_session()
+        session["game_id"] = uuid.uuid4().hex
         return render_template("index.html")
 
     @app.post("/")
@@ -49,6 +92,8 @@ def create_app():
         session["board"] = board.to_json()
         session["human_player"] = human_player.to_json()
         session["next_player"] = "bot_player"
+        if game_is_over:
+            drop_search_session()
 
         return {
             "gameIsOver": game_is_over,
@@ -75,6 +120,9 @@ def create_app():
             game_tree_folder=(
                 MONTECARLO_FILE if MONTECARLO_FILE.exists() else None
             ),
+            session=get_search_session() if NUM_PROCESS == 1 else None,
+            num_process=NUM_PROCESS,
+            time_budget=TIME_BUDGET,
         )
         if move is None:
             game_is_over = True
@@ -92,6 +140,8 @@ def create_app():
         session["board"] = board.to_json()
         session["bot_player"] = bot_player.to_json()
         session["next_player"] = "human_player"
+        if game_is_over:
+            drop_search_session()
 
         return {
             "gameIsOver": game_is_over,
@@ -114,6 +164,7 @@ def create_app():
                 game_tree_folder=(
                     MONTECARLO_FILE if MONTECARLO_FILE.exists() else None
                 ),
+                time_budget=TIME_BUDGET,
             )
         return montecarlo.get_move_stats(
             board,
@@ -123,6 +174,7 @@ def create_app():
             game_tree_folder=(
                 MONTECARLO_FILE if MONTECARLO_FILE.exists() else None
             ),
+            time_budget=TIME_BUDGET,
         )
 
     @app.post("/gameprediction")
@@ -139,6 +191,7 @@ def create_app():
                 game_tree_folder=(
                     MONTECARLO_FILE if MONTECARLO_FILE.exists() else None
                 ),
+                time_budget=TIME_BUDGET,
             )
         else:
             best_play = montecarlo.get_best_play(
@@ -148,6 +201,7 @@ def create_app():
                 game_tree_folder=(
                     MONTECARLO_FILE if MONTECARLO_FILE.exists() else None
                 ),
+                time_budget=TIME_BUDGET,
             )
         return [(node.to_json(), mscore) for node, mscore in best_play]
 
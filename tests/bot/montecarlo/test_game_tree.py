@@ -209,3 +209,49 @@ def test_from_file_red(game_tree, tmp_path, board):
             times_visited=0, times_parent_visited=0, score=0, uct=DEFAULT_UCT
         ),
     }
+
+
+def test_node_code(parent_node, node):
+    assert Node.from_code(node.code) == node
+    assert Node.from_code(parent_node.code) == parent_node
+    assert parent_node.code != node.code
+
+
+def test_sum(board, game_tree, parent_node, node):
+    game_tree.update(parent_node, reward=1)
+    game_tree.update(node, reward=2)
+    total = GameTree.sum([game_tree, game_tree])
+    assert total._game_tree[node].times_visited == 2
+    assert total._game_tree[node].score == 4
+
+
+def test_children_index(board, game_tree, parent_node, node, tmp_path):
+    children = {code for code, _ in game_tree._children(board.get_code())}
+    assert node.code in children
+    assert parent_node.code not in children
+    assert len(children) == 2
+    assert list(game_tree._children(Board().get_code())) == list()
+
+    game_tree.update(node, reward=2)
+    assert game_tree.get_best_move(board.get_frozen()) == node.move_to_play
+
+    game_tree.to_file(tmp_path, player_color=Colors.RED)
+    gm = GameTree.from_file(tmp_path, depth=1, player_color=Colors.RED)
+    assert {code for code, _ in gm._children(board.get_code())} == children
+
+
+def test_sum_union(board, game_tree, parent_node, node):
+    other = GameTree()
+    other_node = Node(
+        board=board.get_frozen(), move_to_play=Move(3, 3, Pawns.B, Colors.RED)
+    )
+    other.add(other_node)
+    other.update(other_node, reward=3)
+    game_tree.update(node, reward=2)
+
+    total = GameTree.sum([game_tree, game_tree, other])
+    assert set(total._game_tree) == set(game_tree._game_tree) | {other_node}
+    assert total._game_tree[other_node].score == 3
+    assert total._game_tree[node].score == 4
+    # the uct is computed again, not summed
+    assert total._game_tree[parent_node].uct == DEFAULT_UCT
@@ -1,10 +1,26 @@
 """Tests for `montecarlo` package."""
 
+import array
 import copy
+import time
+
+import pytest
 
 from quantikai.bot import montecarlo
-from quantikai.bot.montecarlo.main import _montecarlo_algo
+from quantikai.bot.montecarlo.main import (
+    EARLY_STOP_INTERVAL,
+    LEAF_PARALLEL,
+    LEAF_PLAYOUTS,
+    MIN_MAX_NODES,
+    ROOT_PARALLEL,
+    TREE_PARALLEL,
+    _montecarlo_algo,
+    _root_is_decided,
+    _search,
+)
 from quantikai.bot.montecarlo.node import Node
+from quantikai.bot.montecarlo.node_table import ROOT, NodeTable
+from quantikai.bot.montecarlo.score import PROVEN_LOSS, PROVEN_WIN
 from quantikai.game import Board, Colors, Move, Pawns, Player
 
 
@@ -50,6 +66,20 @@ def test_best_move_none():
     best_move = montecarlo.get_best_move(board, blue_player, red_player)
     assert best_move is None
 
+    # blue cannot move: red, the player of the last move, wins
+    node_table = NodeTable()
+    n_iterations, _ = _search(
+        node_table=node_table,
+        board=board,
+        current_player=blue_player,
+        other_player=red_player,
+        iterations=3,
+        use_depth=False,
+    )
+    assert n_iterations == 1
+    assert node_table.proven[ROOT] == PROVEN_WIN
+    assert node_table.scores[ROOT] == node_table.visits[ROOT] == 1
+
 
 def test_best_move_last_full_board():
     # Test with only one possibility
@@ -226,12 +256,23 @@ def test_montecarlo_algo_depth_2():
         board=board1.get_frozen(),
         move_to_play=Move(x=0, y=3, pawn=Pawns("D"), color=Colors.BLUE),
     )
-    assert set(nodes) == {root_node, red_1, red_2, blue_1}
-
-    assert game_tree._game_tree[root_node].times_visited == 2
-
-    for node in {red_1, red_2, blue_1}:
-        assert game_tree._game_tree[node].times_visited == 1
+    # the search stops once the winning move is found
+    scores = game_tree._game_tree
+    assert scores[red_2].proven == PROVEN_WIN
+    assert game_tree.get_best_move(board.get_frozen()) == red_2.move_to_play
+    assert scores[root_node].times_visited == game_tree.iterations
+    assert scores[red_2].times_visited == 1
+    if game_tree.iterations == 2:
+        # red_1 first: it loses
+        assert set(nodes) == {root_node, red_1, red_2, blue_1}
+        assert scores[red_1].proven == PROVEN_LOSS
+        assert scores[blue_1].proven == PROVEN_WIN
+        for node in {red_1, blue_1}:
+            assert scores[node].times_visited == 1
+    else:
+        assert game_tree.iterations == 1
+        assert set(nodes) == {root_node, red_1, red_2}
+        assert scores[red_1].times_visited == 0
 
 
 def test_worst_move():
@@ -302,7 +343,16 @@ def test_best_move_1():
     assert best_move != (2, 3, Pawns.B)
 
 
-def test_best_move_last():
+@pytest.mark.parametrize(
+    "options",
+    [
+        dict(),
+        dict(iterations=200, rollout=True),
+        dict(iterations=200, parallelization=LEAF_PARALLEL),
+        dict(iterations=200, transpositions=True),
+    ],
+)
+def test_best_move_last(options):
     #          0     1     2     3
     #        ____  ____   ____  ____
     #     0 |__A_||__B_| |__C_||____|
@@ -338,11 +388,217 @@ def test_best_move_last():
             Pawns.D,
         ],
     )
-    best_move = montecarlo.get_best_move(board, blue_player, red_player)
+    best_move = montecarlo.get_best_move(
+        board, blue_player, red_player, **options
+    )
     assert best_move == Move(0, 3, Pawns.D, Colors.BLUE), best_move
+    assert blue_player.pawns == [Pawns.A, Pawns.B, Pawns.C, Pawns.D]
 
 
 # TODO
 # test get_best_move with a game tree file
 # test get_best_play with a game tree file
 # test get_move_stats with a game tree file
+
+
+def test_montecarlo_algo_leaf_parallel():
+    board = Board()
+    game_tree = _montecarlo_algo(
+        board=board,
+        current_player=Player(color=Colors.BLUE),
+        other_player=Player(color=Colors.RED),
+        iterations=10,
+        use_depth=True,
+        parallelization=LEAF_PARALLEL,
+    )
+    root_node = Node(board=board.get_frozen(), move_to_play=None)
+    assert game_tree._game_tree[root_node].times_visited == 10 * LEAF_PLAYOUTS
+    # each iteration stops at a new node
+    visited = [m for m in game_tree._scores.values() if m.times_visited]
+    assert len(visited) == 1 + 10
+
+
+def test_montecarlo_algo_rollout():
+    board = Board()
+    game_tree = _montecarlo_algo(
+        board=board,
+        current_player=Player(color=Colors.BLUE),
+        other_player=Player(color=Colors.RED),
+        iterations=50,
+        use_depth=True,
+        rollout=True,
+    )
+    root_node = Node(board=board.get_frozen(), move_to_play=None)
+    assert game_tree._game_tree[root_node].times_visited == 50
+    # each iteration adds one visited node, the rollouts are not stored
+    visited = [m for m in game_tree._scores.values() if m.times_visited]
+    assert len(visited) == 1 + 50
+    assert len(board) == 0
+
+
+def test_montecarlo_algo_max_nodes():
+    board = Board()
+    node_table = NodeTable(capacity=5000)
+    n_iterations, _ = _search(
+        node_table=node_table,
+        board=board,
+        current_player=Player(color=Colors.BLUE),
+        other_player=Player(color=Colors.RED),
+        iterations=100,
+        use_depth=True,
+        max_nodes=5000,
+    )
+    assert n_iterations == 100
+    assert len(node_table) <= 5000
+    assert node_table.capacity == 5000
+    assert node_table.visits[ROOT] == 100
+
+
+def test_montecarlo_algo_min_max_nodes():
+    node_table = NodeTable(capacity=MIN_MAX_NODES)
+    n_iterations, _ = _search(
+        node_table=node_table,
+        board=Board(),
+        current_player=Player(color=Colors.BLUE),
+        other_player=Player(color=Colors.RED),
+        iterations=100,
+        use_depth=True,
+        max_nodes=MIN_MAX_NODES,
+    )
+    assert n_iterations == 100
+    assert node_table.capacity == MIN_MAX_NODES
+
+
+@pytest.mark.parametrize(
+    "max_nodes,num_process,parallelization",
+    [
+        (0, 1, ROOT_PARALLEL),
+        (10, 2, ROOT_PARALLEL),
+        (0, 2, TREE_PARALLEL),
+        (MIN_MAX_NODES - 1, 1, ROOT_PARALLEL),
+    ],
+)
+def test_montecarlo_algo_max_nodes_too_small(
+    max_nodes, num_process, parallelization
+):
+    with pytest.raises(ValueError):
+        _montecarlo_algo(
+            board=Board(),
+            current_player=Player(color=Colors.BLUE),
+            other_player=Player(color=Colors.RED),
+            iterations=10,
+            use_depth=True,
+            num_process=num_process,
+            parallelization=parallelization,
+            max_nodes=max_nodes,
+        )
+
+
+def test_root_is_decided():
+    node_table = NodeTable()
+    node_table.expand(ROOT, [Move(0, 0, Pawns.A, Colors.BLUE)])
+    # a single move
+    assert _root_is_decided(node_table, remaining_visits=100, max_reward=1)
+
+    node_table = NodeTable()
+    node_table.expand(
+        ROOT,
+        [
+            Move(0, 0, Pawns.A, Colors.BLUE),
+            Move(0, 1, Pawns.A, Colors.BLUE),
+            Move(0, 2, Pawns.A, Colors.BLUE),
+        ],
+    )
+    for node, (visits, score) in zip(
+        node_table.children(ROOT), [(60, 30), (30, 15), (10, 5)]
+    ):
+        node_table.update(node, score, n_visits=visits)
+    # the second move may catch up with the first one, same scores
+    assert not _root_is_decided(node_table, remaining_visits=30, max_reward=1)
+    # the second move cannot catch up
+    assert _root_is_decided(node_table, remaining_visits=29, max_reward=1)
+
+    # far better score than the others: wins only, against losses only
+    first = node_table.first_child[ROOT]
+    end = first + 3
+    node_table.scores[first:end] = array.array("q", [60, 0, 0])
+    assert _root_is_decided(node_table, remaining_visits=1000, max_reward=1)
+    # not with rewards up to 16: the intervals are too wide
+    assert not _root_is_decided(
+        node_table, remaining_visits=1000, max_reward=16
+    )
+
+
+def test_search_early_stop():
+    board = Board()
+    blue_player = Player(color=Colors.BLUE)
+    red_player = Player(color=Colors.RED)
+    node_table = NodeTable()
+    node_table.expand(
+        ROOT, list(board.get_possible_moves(blue_player.pawns, Colors.BLUE))
+    )
+    # the other moves cannot catch up with the first one
+    best = node_table.first_child[ROOT]
+    node_table.update(best, 10**5, n_visits=10**5)
+    node_table.update(ROOT, 0, n_visits=10**5)
+    n_iterations, n_saved = _search(
+        node_table=node_table,
+        board=board,
+        current_player=blue_player,
+        other_player=red_player,
+        iterations=1000,
+        use_depth=True,
+        early_stop=True,
+    )
+    assert n_iterations == EARLY_STOP_INTERVAL
+    assert n_saved == 1000 - EARLY_STOP_INTERVAL
+    assert node_table.visits[ROOT] == 10**5 + EARLY_STOP_INTERVAL
+    assert (
+        max(node_table.children(ROOT), key=node_table.visits.__getitem__)
+        == best
+    )
+
+
+def test_montecarlo_algo_early_stop_num_process():
+    with pytest.raises(ValueError):
+        _montecarlo_algo(
+            board=Board(),
+            current_player=Player(color=Colors.BLUE),
+            other_player=Player(color=Colors.RED),
+            iterations=10,
+            use_depth=True,
+            num_process=2,
+            early_stop=True,
+        )
+
+
+def test_montecarlo_algo_leaf_parallel_rollout():
+    with pytest.raises(ValueError):
+        _montecarlo_algo(
+            board=Board(),
+            current_player=Player(color=Colors.BLUE),
+            other_player=Player(color=Colors.RED),
+            iterations=10,
+            use_depth=True,
+            parallelization=LEAF_PARALLEL,
+            rollout=True,
+        )
+
+
+def test_montecarlo_algo_time_budget():
+    board = Board()
+    start = time.time()
+    game_tree = _montecarlo_algo(
+        board=board,
+        current_player=Player(color=Colors.BLUE),
+        other_player=Player(color=Colors.RED),
+        iterations=10**6,
+        use_depth=True,
+        time_budget=0.2,
+    )
+    assert time.time() - start < 2
+    assert 0 < game_tree.iterations < 10**6
+    root_node = Node(board=board.get_frozen(), move_to_play=None)
+    assert (
+        game_tree._game_tree[root_node].times_visited == game_tree.iterations
+    )
@@ -0,0 +1,259 @@
+import random
+
+import pytest
+
+from quantikai.bot.montecarlo.node import Node, child_board_code
+from quantikai.bot.montecarlo.node_table import (
+    ROOT,
+    VECTORIZED_CHILDREN,
+    NodeTable,
+    NodeTableFull,
+    SharedNodeTable,
+)
+from quantikai.bot.montecarlo.score import (
+    DEFAULT_UCT,
+    PROVEN_LOSS,
+    PROVEN_WIN,
+    UNPROVEN,
+)
+from quantikai.game import Board, Colors, Move, Pawns
+from quantikai.game.move import MOVES
+
+
+@pytest.fixture
+def board():
+    return Board(board={(0, 0): (Pawns.A, Colors.BLUE)})
+
+
+@pytest.fixture
+def moves():
+    return [
+        Move(2, 2, Pawns.A, Colors.RED),
+        Move(2, 3, Pawns.B, Colors.RED),
+    ]
+
+
+@pytest.fixture
+def node_table(moves):
+    node_table = NodeTable()
+    node_table.expand(ROOT, moves)
+    return node_table
+
+
+def test_expand(node_table, moves):
+    assert len(node_table) == 3
+    assert node_table.is_expanded(ROOT)
+    assert [node_table.move(n) for n in node_table.children(ROOT)] == moves
+    for child in node_table.children(ROOT):
+        assert not node_table.is_expanded(child)
+        assert node_table.children(child) == range(0)
+        assert node_table.parents[child] == ROOT
+    assert node_table.move(ROOT) is None
+
+
+def test_expand_no_move(node_table):
+    node_table.expand(1, [])
+    assert node_table.is_expanded(1)
+    assert node_table.select_child(1) is None
+
+
+def test_grow():
+    node_table = NodeTable(capacity=2)
+    for node in range(10):
+        node_table.expand(node, [Move(0, 0, Pawns.A, Colors.RED)])
+    assert len(node_table) == 11
+    assert node_table.capacity >= 11
+    assert list(node_table.parents[1:11]) == list(range(10))
+
+
+def test_select_child(node_table):
+    # not visited: the last child
+    assert node_table.select_child(ROOT) == 2
+    node_table.update(ROOT, 0)
+    node_table.update(2, 16)
+    assert node_table.uct(1) == DEFAULT_UCT
+    assert node_table.select_child(ROOT) == 1
+    node_table.update(ROOT, 0)
+    node_table.update(1, 0)
+    assert node_table.uct(2) > node_table.uct(1)
+    assert node_table.select_child(ROOT) == 2
+
+
+@pytest.mark.parametrize("shared", [False, True])
+def test_select_child_vectorized(shared):
+    n_children = 2 * VECTORIZED_CHILDREN
+    if shared:
+        node_table = SharedNodeTable(capacity=n_children + 1)
+    else:
+        node_table = NodeTable()
+    try:
+        node_table.expand(ROOT, MOVES[:n_children])
+        children = node_table.children(ROOT)
+        rng = random.Random(0)
+        for parent_visits in (10**3, 10**6):
+            node_table.visits[ROOT] = parent_visits
+            for child in children:
+                visits = rng.randint(1, 500)
+                node_table.visits[child] = visits
+                node_table.scores[child] = rng.randint(0, 16 * visits)
+            assert node_table.select_child(ROOT) == max(
+                children, key=node_table.uct
+            )
+        # not visited: the last one
+        node_table.visits[children[3]] = 0
+        node_table.visits[children[5]] = 0
+        assert node_table.select_child(ROOT) == children[5]
+        # proven win
+        node_table.proven[children[7]] = PROVEN_WIN
+        assert node_table.select_child(ROOT) == children[7]
+    finally:
+        if shared:
+            node_table.close(unlink=True)
+
+
+def test_solve(node_table):
+    assert not node_table.solve(ROOT)
+    node_table.proven[2] = PROVEN_LOSS
+    assert not node_table.solve(ROOT)
+    # the proven loss is left aside while there are other children
+    assert node_table.select_child(ROOT) == 1
+    node_table.proven[1] = PROVEN_LOSS
+    assert node_table.select_child(ROOT) == 1
+    assert node_table.solve(ROOT)
+    assert node_table.proven[ROOT] == PROVEN_WIN
+
+    node_table.proven[ROOT] = UNPROVEN
+    node_table.proven[2] = PROVEN_WIN
+    assert node_table.select_child(ROOT) == 2
+    assert node_table.solve(ROOT)
+    assert node_table.proven[ROOT] == PROVEN_LOSS
+    assert node_table.subtree(ROOT).proven[2] == PROVEN_WIN
+
+
+def test_child_board_code(board, moves):
+    code = child_board_code(board.get_code(), moves[0].code)
+    board.play(moves[0])
+    assert code == board.get_code()
+
+
+def test_to_game_tree(board, node_table, moves):
+    node_table.expand(1, [Move(0, 3, Pawns.B, Colors.BLUE)])
+    for node in (ROOT, 1, 3):
+        node_table.update(node, 1)
+    child_board = board.copy()
+    child_board.play(moves[0])
+
+    game_tree = node_table.to_game_tree(board.get_code())
+    assert set(game_tree._game_tree) == {
+        Node(board=board.get_frozen()),
+        Node(board=board.get_frozen(), move_to_play=moves[0]),
+        Node(board=board.get_frozen(), move_to_play=moves[1]),
+        Node(
+            board=child_board.get_frozen(),
+            move_to_play=Move(0, 3, Pawns.B, Colors.BLUE),
+        ),
+    }
+    assert game_tree.get_best_move(board.get_frozen()) == moves[0]
+
+    game_tree = node_table.to_game_tree(board.get_code(), max_depth=0)
+    assert len(game_tree._scores) == 3
+
+
+def test_subtree(node_table, moves):
+    node_table.expand(2, [Move(0, 3, Pawns.B, Colors.BLUE)])
+    node_table.expand(3, [])
+    for node in (ROOT, 2, 3):
+        node_table.update(node, 2)
+
+    subtree = node_table.subtree(2)
+    assert len(subtree) == 2
+    assert subtree.visits[ROOT] == 1
+    assert subtree.scores[ROOT] == 2
+    assert subtree.move(ROOT) is None
+    assert [subtree.move(n) for n in subtree.children(ROOT)] == [
+        Move(0, 3, Pawns.B, Colors.BLUE)
+    ]
+    assert subtree.visits[1] == 1
+    assert subtree.is_expanded(1)
+    assert subtree.select_child(1) is None
+
+
+@pytest.mark.parametrize("shared", [False, True])
+def test_prune(moves, shared):
+    if shared:
+        node_table = SharedNodeTable(capacity=10)
+        node_table.set_range(1, 10)
+    else:
+        node_table = NodeTable()
+    try:
+        node_table.expand(ROOT, moves)
+        node_table.expand(1, moves)
+        node_table.expand(2, moves)
+        node_table.update(ROOT, 10, n_visits=10)
+        node_table.update(1, 7, n_visits=7)
+        node_table.update(2, 3, n_visits=3)
+        node_table.update(3, 7, n_visits=7)
+
+        assert node_table.prune(5) == 2
+        assert len(node_table) == 5
+        assert node_table.visits[ROOT] == 10
+        # the children of the least visited node are removed
+        assert list(node_table.children(1)) == [3, 4]
+        assert node_table.visits[3] == 7
+        assert not node_table.is_expanded(2)
+        assert node_table.visits[2] == 3
+        assert node_table.scores[2] == 3
+
+        # the root and its children are always kept
+        assert node_table.prune(1) == 2
+        assert list(node_table.children(ROOT)) == [1, 2]
+        assert not node_table.is_expanded(1)
+
+        # the new children do not get the stats of the removed nodes
+        node_table.expand(1, moves)
+        assert list(node_table.children(1)) == [3, 4]
+        for node in (3, 4):
+            assert node_table.visits[node] == 0
+            assert node_table.scores[node] == 0
+            assert node_table.proven[node] == UNPROVEN
+            assert not node_table.is_expanded(node)
+    finally:
+        if shared:
+            node_table.close(unlink=True)
+
+
+def test_shared_node_table(moves):
+    node_table = SharedNodeTable(capacity=5)
+    try:
+        node_table.set_range(1, 3)
+        node_table.expand(ROOT, moves)
+        node_table.update(1, 3)
+        with pytest.raises(NodeTableFull):
+            node_table.expand(1, moves)
+
+        other = SharedNodeTable(capacity=5, name=node_table.name)
+        other.set_range(3, 5)
+        assert [other.move(n) for n in other.children(ROOT)] == moves
+        assert other.visits[1] == 1
+        other.expand(1, moves)
+        other.close()
+        assert list(node_table.children(1)) == [3, 4]
+    finally:
+        node_table.close(unlink=True)
+
+
+def test_to_game_tree_add(board, node_table, moves):
+    for node in (ROOT, 1):
+        node_table.update(node, 2)
+    game_tree = node_table.to_game_tree(board.get_code())
+    node_table.to_game_tree(board.get_code(), game_tree=game_tree)
+    other = NodeTable()
+    other.expand(ROOT, [Move(3, 3, Pawns.C, Colors.RED)])
+    other.to_game_tree(board.get_code(), game_tree=game_tree)
+    game_tree.compute_uct()
+
+    root = game_tree._game_tree[Node(board=board.get_frozen())]
+    assert root.times_visited == 2
+    assert root.score == 4
+    assert len(game_tree._scores) == 4
+    assert game_tree.get_best_move(board.get_frozen()) == moves[0]
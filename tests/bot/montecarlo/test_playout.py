@@ -0,0 +1,82 @@
+"""Tests for the vectorized random playouts."""
+
+import numpy as np
+
+from quantikai.bot.montecarlo.playout import PlayoutBatch, random_playouts
+from quantikai.game import Board, Colors, Pawns, Player
+
+
+def test_random_playouts_empty_board():
+    wins, n_moves = random_playouts(
+        Board(),
+        Player(color=Colors.BLUE),
+        Player(color=Colors.RED),
+        n=200,
+        rng=np.random.default_rng(0),
+    )
+    assert wins.shape == (200,)
+    assert 0 < wins.sum() < 200
+    # a game lasts at least 4 moves and at most 16
+    assert n_moves.min() >= 4
+    assert n_moves.max() <= 16
+
+
+def test_random_playouts_no_move():
+    board = Board(
+        board={
+            (0, 0): (Pawns.A, Colors.BLUE),
+            (0, 1): (Pawns.C, Colors.BLUE),
+            (0, 2): (Pawns.B, Colors.RED),
+            (0, 3): (Pawns.B, Colors.RED),
+            (1, 0): (Pawns.B, Colors.RED),
+            (1, 2): (Pawns.B, Colors.RED),
+            (1, 3): (Pawns.B, Colors.BLUE),
+            (2, 0): (Pawns.B, Colors.RED),
+            (2, 1): (Pawns.D, Colors.BLUE),
+            (2, 2): (Pawns.A, Colors.BLUE),
+            (2, 3): (Pawns.B, Colors.BLUE),
+            (3, 0): (Pawns.A, Colors.BLUE),
+            (3, 1): (Pawns.D, Colors.BLUE),
+            (3, 2): (Pawns.A, Colors.BLUE),
+            (3, 3): (Pawns.D, Colors.BLUE),
+        }
+    )
+    wins, n_moves = random_playouts(
+        board,
+        Player(color=Colors.RED, pawns=[Pawns.B]),
+        Player(color=Colors.BLUE, pawns=[Pawns.C]),
+        n=10,
+    )
+    assert not wins.any()
+    assert (n_moves == 0).all()
+
+
+def test_random_playouts_last_move():
+    board = Board(
+        board={
+            (0, 0): (Pawns.A, Colors.BLUE),
+            (0, 1): (Pawns.B, Colors.BLUE),
+            (0, 2): (Pawns.C, Colors.BLUE),
+            (1, 0): (Pawns.C, Colors.RED),
+            (1, 1): (Pawns.C, Colors.RED),
+            (1, 2): (Pawns.B, Colors.RED),
+            (1, 3): (Pawns.D, Colors.BLUE),
+            (2, 0): (Pawns.A, Colors.BLUE),
+            (2, 1): (Pawns.D, Colors.RED),
+            (2, 2): (Pawns.C, Colors.BLUE),
+            (3, 0): (Pawns.D, Colors.RED),
+            (3, 1): (Pawns.B, Colors.BLUE),
+            (3, 2): (Pawns.A, Colors.RED),
+            (3, 3): (Pawns.A, Colors.RED),
+        }
+    )
+    batch = PlayoutBatch(
+        board,
+        Player(color=Colors.BLUE, pawns=[Pawns.D]),
+        Player(color=Colors.RED, pawns=[Pawns.B]),
+        n=10,
+    )
+    # the only move, in (0, 3), completes the first row
+    assert batch.step() == 0
+    assert (batch.winner == 0).all()
+    assert (batch.n_moves == 1).all()
@@ -0,0 +1,119 @@
+import os
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from quantikai.bot.montecarlo import main, pool
+from quantikai.bot.montecarlo.main import TREE_PARALLEL, _montecarlo_algo
+from quantikai.bot.montecarlo.node import Node
+from quantikai.bot.montecarlo.node_table import NODE_SIZE
+from quantikai.game import Board, Colors, Player
+
+
+def test_run_in_pool():
+    pids = pool.run_in_pool(os.getpid, [(), ()])
+    assert len(pids) == 2
+    assert os.getpid() not in pids
+    # the same pool serves the next calls
+    first_pool = pool.get_pool(2)
+    pool.run_in_pool(os.getpid, [()])
+    assert pool.get_pool(1) is first_pool
+    pool.shutdown_pool()
+    assert pool._pool is None
+
+
+class BrokenPool:
+    def __init__(self):
+        self.submitted = 0
+
+    def submit(self, function, *args):
+        self.submitted += 1
+        future = Future()
+        future.set_exception(BrokenProcessPool())
+        return future
+
+
+@pytest.mark.parametrize("retry,submitted", [(True, 2), (False, 1)])
+def test_run_in_pool_retry(monkeypatch, retry, submitted):
+    broken_pool = BrokenPool()
+    monkeypatch.setattr(pool, "get_pool", lambda num_process: broken_pool)
+    with pytest.raises(BrokenProcessPool):
+        pool.run_in_pool(os.getpid, [()], retry=retry)
+    assert broken_pool.submitted == submitted
+
+
+def test_montecarlo_algo_root_parallel():
+    board = Board()
+    game_tree = _montecarlo_algo(
+        board=board,
+        current_player=Player(color=Colors.BLUE),
+        other_player=Player(color=Colors.RED),
+        iterations=20,
+        use_depth=True,
+        num_process=2,
+    )
+    pool.shutdown_pool()
+    root = game_tree._game_tree[Node(board=board.get_frozen())]
+    assert root.times_visited == 40
+    assert game_tree.iterations == 40
+    assert game_tree.get_best_move(board.get_frozen()) is not None
+
+
+def test_montecarlo_algo_root_parallel_shared_memory(monkeypatch):
+    # room for 3000 nodes per process: the trees are pruned, the processes
+    # do not stop
+    monkeypatch.setattr(main, "SHARED_MEMORY", 2 * 3000 * NODE_SIZE)
+    board = Board()
+    game_tree = _montecarlo_algo(
+        board=board,
+        current_player=Player(color=Colors.BLUE),
+        other_player=Player(color=Colors.RED),
+        iterations=100,
+        use_depth=True,
+        num_process=2,
+    )
+    pool.shutdown_pool()
+    root = game_tree._game_tree[Node(board=board.get_frozen())]
+    assert root.times_visited == 200
+    assert game_tree.iterations == 200
+
+
+def test_montecarlo_algo_tree_parallel():
+    board = Board()
+    game_tree = _montecarlo_algo(
+        board=board,
+        current_player=Player(color=Colors.BLUE),
+        other_player=Player(color=Colors.RED),
+        iterations=20,
+        use_depth=True,
+        num_process=2,
+        parallelization=TREE_PARALLEL,
+    )
+    pool.shutdown_pool()
+    root = game_tree._game_tree[Node(board=board.get_frozen())]
+    # a few visits may be lost, the processes do not lock the tree
+    assert 30 <= root.times_visited <= 40
+    assert len(game_tree._scores) > 4
+    assert game_tree.get_best_move(board.get_frozen()) is not None
+
+
+def test_montecarlo_algo_tree_parallel_full(monkeypatch):
+    # room for 3000 nodes: the tree stops growing, the iterations go on
+    monkeypatch.setattr(main, "SHARED_MEMORY", 3000 * NODE_SIZE)
+    board = Board()
+    game_tree = _montecarlo_algo(
+        board=board,
+        current_player=Player(color=Colors.BLUE),
+        other_player=Player(color=Colors.RED),
+        iterations=100,
+        use_depth=True,
+        num_process=2,
+        parallelization=TREE_PARALLEL,
+    )
+    pool.shutdown_pool()
+    root = game_tree._game_tree[Node(board=board.get_frozen())]
+    # a few visits may be lost, the processes do not lock the tree
+    assert 150 <= root.times_visited <= 200
+    assert game_tree.iterations == 200
+    assert game_tree.get_best_move(board.get_frozen()) is not None
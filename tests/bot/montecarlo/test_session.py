@@ -0,0 +1,175 @@
+import pytest
+
+from quantikai.bot.montecarlo import SearchSession
+from quantikai.bot.montecarlo.main import EARLY_STOP_INTERVAL, MIN_MAX_NODES
+from quantikai.bot.montecarlo.node_table import ROOT
+from quantikai.bot.montecarlo.score import UNPROVEN
+from quantikai.game import Board, Colors, Pawns, Player, bitboard, symmetry
+from quantikai.game.symmetry import Symmetry
+
+
+@pytest.fixture
+def board():
+    return Board(
+        board={
+            (0, 0): (Pawns.A, Colors.BLUE),
+            (1, 1): (Pawns.C, Colors.BLUE),
+            (3, 0): (Pawns.B, Colors.RED),
+        }
+    )
+
+
+@pytest.fixture
+def blue_player():
+    return Player(
+        color=Colors.BLUE, pawns=[Pawns.A, Pawns.B, Pawns.C, Pawns.D]
+    )
+
+
+@pytest.fixture
+def red_player():
+    return Player(color=Colors.RED, pawns=[Pawns.A, Pawns.B, Pawns.C, Pawns.D])
+
+
+def play(board, player, move):
+    board.play(move)
+    player.remove(move.pawn)
+
+
+def test_reuse_tree(board, blue_player, red_player):
+    session = SearchSession(iterations=200, all_possible_moves=True)
+    move = session.get_best_move(board, red_player, blue_player)
+    play(board, red_player, move)
+
+    # the most visited reply of the human player, not proven for the
+    # next search to run at least one iteration
+    node_table = session._node_table
+    bot_node = next(
+        n for n in node_table.children(ROOT) if node_table.move(n) == move
+    )
+    reply = max(
+        (
+            n
+            for n in node_table.children(bot_node)
+            if node_table.proven[n] == UNPROVEN
+        ),
+        key=node_table.visits.__getitem__,
+    )
+    visits = node_table.visits[reply]
+    assert visits > 0
+    play(board, blue_player, node_table.move(reply))
+
+    session.get_best_move(board, red_player, blue_player)
+    # fewer than 200 iterations if the position is solved
+    assert session.iterations_done > 0
+    assert session._node_table.visits[ROOT] == (
+        visits + session.iterations_done
+    )
+
+
+def test_reuse_tree_symmetric_reply(blue_player, red_player):
+    board = Board()
+    session = SearchSession(iterations=200)
+    move = session.get_best_move(board, blue_player, red_player)
+    play(board, blue_player, move)
+
+    # a reply of the human player left out of the tree as the image of
+    # another one by a symmetry of the position
+    node_table = session._node_table
+    bot_node = next(
+        n for n in node_table.children(ROOT) if node_table.move(n) == move
+    )
+    kept = {node_table.move(n): n for n in node_table.children(bot_node)}
+    pawn_counts = [0] * len(bitboard.PAWNS)
+    for pawn in red_player.pawns:
+        pawn_counts[bitboard.PAWN_INDEX[pawn]] += 1
+    images = [
+        (
+            Symmetry(
+                geometry=symmetry.GEOMETRY_INDEX[cells],
+                pawns=symmetry.PAWN_PERMUTATION_INDEX[pawns],
+            ).apply_move(kept_move),
+            node,
+        )
+        for kept_move, node in kept.items()
+        for cells, pawns in symmetry.stabilizer(
+            symmetry.unpack(board.get_code()), pawn_counts
+        )
+    ]
+    reply, reply_node = max(
+        ((m, n) for m, n in images if m not in kept),
+        key=lambda item: node_table.visits[item[1]],
+    )
+    visits = node_table.visits[reply_node]
+    assert visits > 0
+    play(board, red_player, reply)
+
+    session.get_best_move(board, blue_player, red_player)
+    assert session._node_table.visits[ROOT] == (
+        visits + session.iterations_done
+    )
+    # the moves of the tree are the moves on the board
+    node_table = session._node_table
+    assert {node_table.move(n) for n in node_table.children(ROOT)} <= set(
+        board.get_possible_moves(blue_player.pawns, blue_player.color)
+    )
+
+
+def test_new_tree(board, blue_player, red_player):
+    session = SearchSession(iterations=50, all_possible_moves=True)
+    session.get_best_move(board, red_player, blue_player)
+
+    # not a position of the tree
+    session.get_best_move(Board(), red_player, blue_player)
+    assert session._node_table.visits[ROOT] == 50
+
+    # same board, other player to play
+    session.get_best_move(Board(), blue_player, red_player)
+    assert session._node_table.visits[ROOT] == 50
+
+
+def test_same_position(board, blue_player, red_player):
+    session = SearchSession(iterations=50)
+    first = session.get_best_move(board, red_player, blue_player)
+    assert first is not None
+    session.get_best_move(board, red_player, blue_player)
+    assert session._node_table.visits[ROOT] == 100
+
+
+def test_time_budget(board, blue_player, red_player):
+    session = SearchSession(iterations=10**6, time_budget=0.1)
+    assert session.get_best_move(board, red_player, blue_player) is not None
+    assert 0 < session.iterations_done < 10**6
+
+
+def test_early_stop(blue_player, red_player):
+    # from the empty board, no move can be proven in so few iterations:
+    # the best move is the most visited one
+    board = Board()
+    session = SearchSession(iterations=1000, early_stop=True)
+    session.get_best_move(board, blue_player, red_player)
+
+    # same position: the tree is reused, the other moves cannot catch up
+    # with the first one anymore
+    node_table = session._node_table
+    best = node_table.first_child[ROOT]
+    node_table.update(best, 10**5, n_visits=10**5)
+    node_table.update(ROOT, 0, n_visits=10**5)
+    move = session.get_best_move(board, blue_player, red_player)
+    assert move == node_table.move(best)
+    assert session.iterations_done == EARLY_STOP_INTERVAL
+    assert session.iterations_saved == 1000 - EARLY_STOP_INTERVAL
+
+
+def test_max_nodes(blue_player, red_player):
+    board = Board()
+    session = SearchSession(iterations=100, max_nodes=MIN_MAX_NODES)
+    move = session.get_best_move(board, blue_player, red_player)
+    assert len(session._node_table) <= MIN_MAX_NODES
+    play(board, blue_player, move)
+    session.get_best_move(board, red_player, blue_player)
+    assert session.iterations_done == 100
+    assert len(session._node_table) <= MIN_MAX_NODES
+
+    with pytest.raises(ValueError):
+        SearchSession(max_nodes=MIN_MAX_NODES - 1)
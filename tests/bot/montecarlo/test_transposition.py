@@ -0,0 +1,147 @@
+import pytest
+
+from quantikai.bot.montecarlo.main import _montecarlo_algo, _search
+from quantikai.bot.montecarlo.node import Node
+from quantikai.bot.montecarlo.node_table import ROOT
+from quantikai.bot.montecarlo.transposition import (
+    IDENTITY,
+    TranspositionNodeTable,
+    position_key,
+)
+from quantikai.game import Board, Colors, Move, Pawns, Player
+from quantikai.game.symmetry import SYMMETRIES, Symmetry
+
+
+@pytest.fixture
+def board():
+    return Board(
+        board={
+            (0, 0): (Pawns.A, Colors.BLUE),
+            (1, 3): (Pawns.C, Colors.RED),
+        }
+    )
+
+
+@pytest.fixture
+def sym():
+    return Symmetry(geometry=3, pawns=7, swap_colors=True)
+
+
+def _image(board, sym):
+    other = Board()
+    for (x, y), (pawn, color) in board._board.items():
+        other.play(sym.apply_move(Move(x, y, pawn, color)))
+    return other
+
+
+def _hand(player, sym):
+    return Player(
+        color=sym.apply_color(player.color),
+        pawns=[
+            sym.apply_move(Move(0, 0, pawn, player.color)).pawn
+            for pawn in player.pawns
+        ],
+    )
+
+
+def test_position_key(board, sym):
+    blue = Player(color=Colors.BLUE, pawns=[Pawns.B, Pawns.C, Pawns.D])
+    red = Player(color=Colors.RED, pawns=[Pawns.A, Pawns.B, Pawns.D])
+    key, _ = position_key(board, blue, red)
+    other_key, _ = position_key(
+        _image(board, sym), _hand(blue, sym), _hand(red, sym)
+    )
+    assert other_key == key
+    # other player to play, other pawns left
+    assert position_key(board, red, blue)[0] != key
+    red.remove(Pawns.D)
+    assert position_key(board, blue, red)[0] != key
+
+
+def test_find_position(board, sym):
+    blue = Player(color=Colors.BLUE)
+    red = Player(color=Colors.RED)
+    node_table = TranspositionNodeTable()
+    node_table.expand(ROOT, [Move(0, 0, Pawns.A, Colors.BLUE)] * 2)
+
+    frame = node_table.find_position(1, board, blue, red, IDENTITY)
+    assert frame == IDENTITY
+    assert not node_table.is_expanded(1)
+    moves = list(board.get_possible_moves(blue.pawns, blue.color))
+    node_table.expand(1, moves)
+
+    other = _image(board, sym)
+    other_blue = _hand(blue, sym)
+    frame = node_table.find_position(
+        2, other, other_blue, _hand(red, sym), IDENTITY
+    )
+    assert node_table.children(2) == node_table.children(1)
+    assert node_table.links[2] == frame
+    # the shared moves are mapped to the moves on the other board
+    assert {
+        SYMMETRIES[frame].apply_move(node_table.move(child))
+        for child in node_table.children(2)
+    } == set(other.get_possible_moves(other_blue.pawns, other_blue.color))
+    assert node_table.n_transpositions == 1
+
+
+def test_search():
+    board = Board()
+    node_table = TranspositionNodeTable()
+    n_iterations, _ = _search(
+        node_table,
+        board,
+        Player(color=Colors.BLUE),
+        Player(color=Colors.RED),
+        iterations=300,
+        use_depth=True,
+    )
+    assert n_iterations == 300
+    assert node_table.n_transpositions > 0
+    assert board.get_code() == Board().get_code()
+    game_tree = node_table.to_game_tree(board.get_code())
+    root = game_tree._scores[Node(board.get_frozen()).code]
+    assert root.times_visited == 300
+    for node in game_tree._game_tree:
+        if node.move_to_play is not None:
+            # the moves are valid on the board of their node
+            played = Board(
+                board={(x, y): (p, c) for x, y, p, c in node.board.board}
+            )
+            played.play(node.move_to_play)
+
+
+def test_max_nodes():
+    # the shared children cannot be pruned
+    with pytest.raises(ValueError):
+        _montecarlo_algo(
+            Board(),
+            Player(color=Colors.BLUE),
+            Player(color=Colors.RED),
+            iterations=10,
+            use_depth=True,
+            transpositions=True,
+            max_nodes=3000,
+        )
+
+
+def test_prune():
+    node_table = TranspositionNodeTable()
+    node_table.expand(ROOT, [Move(0, 0, Pawns.A, Colors.BLUE)])
+    with pytest.raises(ValueError):
+        node_table.prune(1)
+    with pytest.raises(ValueError):
+        node_table.subtree(node_table.first_child[ROOT])
+
+
+def test_num_process():
+    with pytest.raises(ValueError):
+        _montecarlo_algo(
+            Board(),
+            Player(color=Colors.BLUE),
+            Player(color=Colors.RED),
+            iterations=10,
+            use_depth=True,
+            num_process=2,
+            transpositions=True,
+        )
@@ -3,7 +3,14 @@
 """Tests for `game` package."""
 import pytest
 
-from quantikai.game import Board, Colors, InvalidMoveError, Move, Pawns
+from quantikai.game import (
+    Board,
+    Colors,
+    FrozenBoard,
+    InvalidMoveError,
+    Move,
+    Pawns,
+)
 
 
 @pytest.fixture
@@ -450,3 +457,117 @@ def test_from_json():
             [None, None, None, None],
         ]
     )
+
+
+def test_full_row_same_pawn_is_not_win():
+    board = Board(
+        board={
+            (0, 0): (Pawns.A, Colors.BLUE),
+            (0, 1): (Pawns.B, Colors.BLUE),
+            (0, 2): (Pawns.A, Colors.BLUE),
+        }
+    )
+    assert not board.play(Move(0, 3, Pawns.C, Colors.BLUE))
+
+
+def test_masks_match_board(fixture_board_1):
+    fixture_board_1.play(Move(3, 2, Pawns.A, Colors.BLUE))
+    assert (
+        fixture_board_1._masks
+        == Board(board=dict(fixture_board_1._board))._masks
+    )
+    assert fixture_board_1._occupied.bit_count() == len(fixture_board_1)
+
+
+def test_forbidden_cells():
+    board = Board()
+    board.play(Move(0, 0, Pawns.A, Colors.RED))
+    moves = set(board.get_possible_moves([Pawns.A], color=Colors.BLUE))
+    assert {(m.x, m.y) for m in moves} == {
+        (x, y) for x in range(2, 4) for y in range(1, 4)
+    } | {(1, 2), (1, 3)}
+    # RED can still play its own pawn anywhere
+    moves = set(board.get_possible_moves([Pawns.A], color=Colors.RED))
+    assert len(moves) == 15
+
+
+def test_undo(fixture_board_1):
+    before = fixture_board_1.copy()
+    moves = [
+        Move(3, 2, Pawns.A, Colors.BLUE),
+        Move(1, 2, Pawns.D, Colors.RED),
+        Move(1, 0, Pawns.A, Colors.RED),
+    ]
+    for move in moves:
+        fixture_board_1.play(move)
+    for move in reversed(moves):
+        fixture_board_1.undo(move)
+    assert fixture_board_1._board == before._board
+    assert fixture_board_1._masks == before._masks
+    assert fixture_board_1._forbidden == before._forbidden
+    assert fixture_board_1._occupied == before._occupied
+
+
+def test_undo_overlapping_zones():
+    board = Board()
+    board.play(Move(0, 0, Pawns.A, Colors.RED))
+    board.play(Move(1, 1, Pawns.A, Colors.RED))
+    board.undo(Move(1, 1, Pawns.A, Colors.RED))
+    # (0, 1) is still forbidden by the pawn in (0, 0)
+    with pytest.raises(InvalidMoveError):
+        board.play(Move(0, 1, Pawns.A, Colors.BLUE))
+    assert board.play(Move(1, 2, Pawns.A, Colors.BLUE)) is False
+
+
+def test_get_possible_moves_optimize_pawn_relabeling():
+    board = Board()
+    board.play(Move(0, 0, Pawns.A, Colors.RED))
+    board.play(Move(3, 3, Pawns.B, Colors.RED))
+    moves = set(
+        board.get_possible_moves(
+            pawns=2 * list(Pawns), color=Colors.BLUE, optimize=True
+        )
+    )
+    # the half-turn swaps the two corners and the pawns A and B
+    assert Move(0, 1, Pawns.C, Colors.BLUE) in moves
+    assert Move(3, 2, Pawns.C, Colors.BLUE) not in moves
+    assert Move(1, 0, Pawns.C, Colors.BLUE) not in moves
+    assert Move(1, 2, Pawns.A, Colors.BLUE) in moves
+    assert Move(2, 1, Pawns.B, Colors.BLUE) not in moves
+    assert {m.pawn for m in moves} == {Pawns.A, Pawns.B, Pawns.C}
+
+
+def test_get_winning_moves(fixture_board_win_first):
+    moves = fixture_board_win_first.get_winning_moves(
+        [Pawns.B, Pawns.C], Colors.BLUE
+    )
+    assert set(moves) == {
+        Move(0, 3, Pawns.B, Colors.BLUE),
+        Move(3, 0, Pawns.B, Colors.BLUE),
+        Move(1, 1, Pawns.B, Colors.BLUE),
+    }
+    assert not fixture_board_win_first.have_winning_move(
+        [Pawns.A, Pawns.C], Colors.BLUE
+    )
+
+
+def test_get_winning_moves_forbidden(fixture_board_win_first):
+    fixture_board_win_first.play(Move(3, 3, Pawns.B, Colors.RED))
+    # B is forbidden in the last row and column, not in the first section
+    moves = fixture_board_win_first.get_winning_moves([Pawns.B], Colors.BLUE)
+    assert moves == [Move(1, 1, Pawns.B, Colors.BLUE)]
+    fixture_board_win_first.undo(Move(3, 3, Pawns.B, Colors.RED))
+    assert (
+        len(fixture_board_win_first.get_winning_moves([Pawns.B], Colors.BLUE))
+        == 3
+    )
+
+
+def test_code(fixture_board_1):
+    frozen = fixture_board_1.get_frozen()
+    assert fixture_board_1.get_code() == frozen.code
+    assert FrozenBoard.from_code(frozen.code) == frozen
+    fixture_board_1.play(Move(3, 2, Pawns.A, Colors.BLUE))
+    assert fixture_board_1.get_code() == fixture_board_1.get_frozen().code
+    fixture_board_1.undo(Move(3, 2, Pawns.A, Colors.BLUE))
+    assert fixture_board_1.get_code() == frozen.code
@@ -0,0 +1,22 @@
+"""Tests for the `move` module."""
+
+from quantikai.game import Board, Colors, Move, Pawns
+from quantikai.game.move import MOVES
+
+
+def test_code_round_trip():
+    assert len(MOVES) == 128
+    for code, move in enumerate(MOVES):
+        assert move.code == code
+        assert Move.from_code(code) is move
+
+
+def test_code():
+    move = Move(2, 1, Pawns.C, Colors.RED)
+    assert Move.from_code(move.code) == move
+
+
+def test_possible_moves_are_shared():
+    board = Board()
+    for move in board.get_possible_moves(list(Pawns), Colors.BLUE):
+        assert Move.from_code(move.code) is move
@@ -0,0 +1,39 @@
+"""Tests for the `player` module."""
+
+import pytest
+
+from quantikai.game import Colors, InvalidMoveError, Pawns, Player
+
+
+def test_remove_add():
+    player = Player(color=Colors.BLUE)
+    player.remove(Pawns.A)
+    player.remove(Pawns.A)
+    with pytest.raises(InvalidMoveError):
+        player.remove(Pawns.A)
+    player.add(Pawns.A)
+    assert player.pawns == [
+        Pawns.A,
+        Pawns.B,
+        Pawns.B,
+        Pawns.C,
+        Pawns.C,
+        Pawns.D,
+        Pawns.D,
+    ]
+
+
+def test_clone():
+    player = Player(color=Colors.RED, pawns=[Pawns.B, Pawns.D])
+    clone = player.clone()
+    clone.remove(Pawns.B)
+    assert player.pawns == [Pawns.B, Pawns.D]
+    assert clone.pawns == [Pawns.D]
+    assert clone.color == Colors.RED
+
+
+def test_json_round_trip():
+    player = Player(color=Colors.RED, pawns=[Pawns.C, Pawns.A, Pawns.C])
+    body = player.to_json()
+    assert body == {"color": "RED", "pawns": ["A", "C", "C"]}
+    assert Player.from_json(body) == player
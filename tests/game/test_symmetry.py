@@ -0,0 +1,80 @@
+"""Tests for the `symmetry` module."""
+
+import pytest
+
+from quantikai.game import Board, Colors, Move, Pawns
+from quantikai.game.symmetry import (
+    CELL_PERMUTATIONS,
+    PAWN_PERMUTATIONS,
+    SYMMETRIES,
+    Symmetry,
+    pack,
+)
+
+
+@pytest.fixture
+def board():
+    return Board(
+        board={
+            (0, 1): (Pawns.A, Colors.RED),
+            (2, 2): (Pawns.A, Colors.BLUE),
+            (3, 3): (Pawns.B, Colors.RED),
+        }
+    )
+
+
+def _cells(board):
+    cells = [0] * 16
+    for (x, y), (pawn, color) in board._board.items():
+        cells[4 * x + y] = (
+            1 + 2 * list(Pawns).index(pawn) + list(Colors).index(color)
+        )
+    return cells
+
+
+def test_canonical_key_maps_back(board):
+    code, sym = board.canonical_key()
+    assert pack(sym.apply_cells(_cells(board))) == code
+    move = Move(1, 2, Pawns.C, Colors.BLUE)
+    assert sym.revert_move(sym.apply_move(move)) == move
+
+
+@pytest.mark.parametrize("geometry", range(len(CELL_PERMUTATIONS)))
+@pytest.mark.parametrize("pawns", [0, 5, len(PAWN_PERMUTATIONS) - 1])
+@pytest.mark.parametrize("swap_colors", [False, True])
+def test_canonical_key_equivalent_boards(board, geometry, pawns, swap_colors):
+    sym = Symmetry(geometry=geometry, pawns=pawns, swap_colors=swap_colors)
+    other = Board()
+    for (x, y), (pawn, color) in board._board.items():
+        other.play(sym.apply_move(Move(x, y, pawn, color)))
+    assert other.canonical_key()[0] == board.canonical_key()[0]
+    assert other.get_frozen().canonical_key()[0] == board.canonical_key()[0]
+
+
+def test_canonical_key_different_boards(board):
+    other = Board(board=dict(board._board))
+    other.play(Move(0, 0, Pawns.C, Colors.BLUE))
+    assert other.canonical_key()[0] != board.canonical_key()[0]
+
+
+def test_canonical_key_no_color_swap(board):
+    other = Board()
+    for (x, y), (pawn, color) in board._board.items():
+        other.play(
+            Symmetry(swap_colors=True).apply_move(Move(x, y, pawn, color))
+        )
+    assert other.canonical_key(swap_colors=False)[0] != (
+        board.canonical_key(swap_colors=False)[0]
+    )
+
+
+def test_compose():
+    move = Move(1, 2, Pawns.C, Colors.BLUE)
+    first = Symmetry(geometry=1, pawns=5, swap_colors=True)
+    second = Symmetry(geometry=6, pawns=17, swap_colors=False)
+    composed = second.compose(first)
+    assert composed.apply_move(move) == second.apply_move(
+        first.apply_move(move)
+    )
+    assert first.inverse().compose(first) == Symmetry()
+    assert SYMMETRIES[composed.index] == composed